@@ -3,6 +3,12 @@ import platform
 import yaml
 from pathlib import Path
 
+# Prefer the libyaml C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 # Base directories
 HOME_DIR = str(Path.home())
 APP_DIR = os.path.join(HOME_DIR, ".saferun")
@@ -10,11 +16,18 @@ SANDBOX_DIR = os.path.join(APP_DIR, "sandbox")
 LOG_DIR = os.path.join(APP_DIR, "logs")
 REPORT_DIR = os.path.join(APP_DIR, "reports")
 TEMP_DIR = os.path.join(APP_DIR, "temp")
+CACHE_DIR = os.path.join(APP_DIR, "cache")
 CONFIG_FILE = os.path.join(APP_DIR, "config", "sandbox_config.yaml")
 
 # Platform-specific settings
 PLATFORM = platform.system()
 
+# Most stdout/stderr kept from each sandboxed process, per stream
+MAX_OUTPUT_BYTES = 1 << 20
+
+# Print intermediate analysis output to the console (SAFERUN_DEBUG=1)
+DEBUG_OUTPUT = os.environ.get("SAFERUN_DEBUG", "") not in ("", "0")
+
 # Default security levels
 SECURITY_LEVELS = {
     "low": {
@@ -50,17 +63,40 @@ SCRIPT_EXTENSIONS = [".js", ".py", ".pl", ".rb", ".php"]
 
 # Initialize app directories
 def init_directories():
-    for directory in [APP_DIR, SANDBOX_DIR, LOG_DIR, REPORT_DIR, TEMP_DIR, os.path.dirname(CONFIG_FILE)]:
+    for directory in [APP_DIR, SANDBOX_DIR, LOG_DIR, REPORT_DIR, TEMP_DIR, CACHE_DIR, os.path.dirname(CONFIG_FILE)]:
         os.makedirs(directory, exist_ok=True)
 
 
+# Parsed configuration, keyed by (path, mtime, size) of CONFIG_FILE
+_CONFIG_CACHE = {}
+
+
 # Load configuration from YAML
 def load_config():
-    if not os.path.exists(CONFIG_FILE):
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
         save_default_config()
+        stat = os.stat(CONFIG_FILE)
+
+    key = (CONFIG_FILE, stat.st_mtime_ns, stat.st_size)
+    if _CONFIG_CACHE.get("key") == key:
+        return _CONFIG_CACHE["config"]
 
+    config = _load_config_without_cache()
+    _CONFIG_CACHE["key"] = key
+    _CONFIG_CACHE["config"] = config
+    return config
+
+
+def _load_config_without_cache():
     with open(CONFIG_FILE, 'r') as file:
-        return yaml.safe_load(file)
+        return yaml.load(file, Loader=_Loader)
+
+
+# Drop the cached configuration so the next load re-reads the file
+def invalidate_config_cache():
+    _CONFIG_CACHE.clear()
 
 
 # Save default configuration
@@ -75,6 +111,8 @@ def save_default_config():
                 os.path.join(HOME_DIR, "Desktop")
             ],
             "max_execution_time": 300,  # seconds
+            "hardlink_staged_files": False,  # link instead of copying samples into the sandbox
+            "reuse_containers": False,  # keep finished containers warm for later files
             "resource_limits": {
                 "cpu_percent": 50,
                 "memory_mb": 1024,
@@ -105,7 +143,7 @@ def save_default_config():
 
     os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
     with open(CONFIG_FILE, 'w') as file:
-        yaml.dump(config, file, default_flow_style=False)
+        yaml.dump(config, file, Dumper=_Dumper, default_flow_style=False, sort_keys=False, width=10**9)
 
     return config
 
@@ -1,8 +1,12 @@
 import os
+import atexit
 import platform
 import logging
+import shutil
+import tempfile
 import uuid
 from abc import ABC, abstractmethod
+from collections import deque
 
 from saferun.config import settings
 
@@ -16,6 +20,39 @@ elif system == "darwin":
 else:
     raise ImportError(f"Unsupported OS: {system}")
 
+def _get_resource_limits():
+    # load_config() is cached on the file's mtime, so edits are picked up without a re-parse per call
+    return settings.load_config().get("sandbox", {}).get("resource_limits", {})
+
+
+# Idle containers kept for reuse (sandbox.reuse_containers), keyed by the
+# parameters they were created with; each entry is (handler, container_id).
+# Only containers without a host bind mount are pooled: a mount pins the
+# container to one sandbox's directory, which is deleted at cleanup.
+_CONTAINER_POOL = {}
+_CONTAINER_POOL_SIZE = 4
+
+
+def _container_reuse_enabled():
+    try:
+        return bool(settings.load_config().get("sandbox", {}).get("reuse_containers", False))
+    except Exception:
+        return False
+
+
+def _drain_container_pool():
+    for idle in _CONTAINER_POOL.values():
+        while idle:
+            handler, container_id = idle.popleft()
+            try:
+                handler.remove_container(container_id)
+            except Exception as e:
+                logging.warning(f"Failed to remove pooled container {container_id}: {e}")
+    _CONTAINER_POOL.clear()
+
+
+atexit.register(_drain_container_pool)
+
 
 class IsolationProvider(ABC):
     @abstractmethod
@@ -30,12 +67,18 @@ class IsolationProvider(ABC):
     @abstractmethod
     def is_available(self): pass
 
+    def reset(self):
+        """Make the environment safe for the next file; by default tear it down"""
+        return self.cleanup()
+
 
 class ContainerIsolation(IsolationProvider):
     def __init__(self, security_level="medium"):
         self.logger = logging.getLogger("container-isolation")
         self.security_level = security_level.lower()
         self.container_id = None
+        self.host_mount = None
+        self._pool_key = None
         self.platform_handler = None
         self.isolation_id = str(uuid.uuid4())
 
@@ -47,14 +90,14 @@ class ContainerIsolation(IsolationProvider):
             platform_module.LinuxContainerHandler() if system == "linux" else platform_module.MacOSContainerHandler()
         )
 
-    def setup(self):
+    def setup(self, host_mount=None):
         self.logger.info(f"Setting up container isolation at {self.security_level} level")
-        return self._create_container()
+        return self._create_container(host_mount)
 
-    def _create_container(self):
+    def _create_container(self, host_mount=None):
         config = {}
         try:
-            config = settings.load_config().get("sandbox", {}).get("resource_limits", {})
+            config = _get_resource_limits()
         except Exception as e:
             self.logger.warning(f"Failed to load resource config: {e}")
 
@@ -62,33 +105,118 @@ class ContainerIsolation(IsolationProvider):
         cpu = config.get("cpu_percent", {}).get(self.security_level, 30)
         net = config.get("network_access", {}).get(self.security_level, False)
 
+        key = (self.security_level, mem, cpu, net)
+        idle = _CONTAINER_POOL.get(key) if host_mount is None else None
+        if idle:
+            # Most recently released first
+            self.container_id = idle.pop()[1]
+            self.host_mount = None
+            self._pool_key = key
+            self.logger.info(f"Reusing container {self.container_id}")
+            return self.container_id
+
         try:
             self.container_id = self.platform_handler.create_container(
                 security_level=self.security_level,
                 memory_limit=mem,
                 cpu_limit=cpu,
-                network_access=net
+                network_access=net,
+                host_mount=host_mount
             )
+            self.host_mount = host_mount if self.container_id else None
+            self._pool_key = key if self.container_id and host_mount is None else None
             return self.container_id
         except Exception as e:
             self.logger.error(f"Failed to create container: {e}")
             raise RuntimeError("Container creation failed")
 
     def cleanup(self):
+        if self.container_id and self._release_to_pool():
+            return True
         if self.container_id:
             try:
                 self.platform_handler.remove_container(self.container_id)
                 self.logger.info(f"Container {self.container_id} removed")
                 self.container_id = None
+                self.host_mount = None
+                self._pool_key = None
                 return True
             except Exception as e:
                 self.logger.error(f"Cleanup failed: {e}")
         return False
 
+    def reset(self):
+        """Keep the container for the next file if it can be wiped, else remove it"""
+        if not self.container_id:
+            return False
+        try:
+            if self.platform_handler.reset_container(self.container_id):
+                return True
+        except Exception as e:
+            self.logger.warning(f"Failed to reset container {self.container_id}: {e}")
+        return self.cleanup()
+
     def execute(self, file_path, args=None):
+        # Mount the file's directory when creating the container so no copy is needed
+        host_dir = os.path.dirname(os.path.abspath(file_path))
         if not self.container_id:
-            self.setup()
-        return self.platform_handler.execute_in_container(self.container_id, file_path, args or [])
+            # Reusable containers get files copied in rather than a mount
+            self.setup(host_mount=None if _container_reuse_enabled() else host_dir)
+        if host_dir == self.host_mount:
+            self._make_executable(file_path)
+            container_path = self.platform_handler.sandbox_path(file_path)
+        else:
+            container_path = self.platform_handler.copy_to_container(self.container_id, file_path)
+        return self.platform_handler.execute_in_container(self.container_id, container_path, args or [])
+
+    def _release_to_pool(self):
+        """Park the container for reuse instead of removing it, if enabled"""
+        if self._pool_key is None or not _container_reuse_enabled():
+            return False
+        # Never hand the next sample a container with this one's processes or files
+        try:
+            if not self.platform_handler.reset_container(self.container_id):
+                return False
+        except Exception as e:
+            self.logger.warning(f"Failed to reset container {self.container_id}, not reusing it: {e}")
+            return False
+
+        idle = _CONTAINER_POOL.setdefault(self._pool_key, deque())
+        idle.append((self.platform_handler, self.container_id))
+        # Evict the longest-idle container once the pool for this key is full
+        while len(idle) > _CONTAINER_POOL_SIZE:
+            handler, container_id = idle.popleft()
+            try:
+                handler.remove_container(container_id)
+            except Exception as e:
+                self.logger.warning(f"Failed to remove pooled container {container_id}: {e}")
+
+        self.logger.info(f"Container {self.container_id} returned to pool")
+        self.container_id = None
+        self.host_mount = None
+        self._pool_key = None
+        return True
+
+    @staticmethod
+    def _make_executable(file_path):
+        """Set the exec bit on a staged file so it can run from the read-only mount"""
+        if system == "windows":
+            return
+        st = os.stat(file_path)
+        if st.st_mode & 0o111:
+            return
+        # A hard-linked file shares its mode with the original, so replace the
+        # link with a private copy before changing it (the mount can't be written to)
+        if st.st_nlink > 1:
+            fd, private_copy = tempfile.mkstemp(dir=os.path.dirname(file_path))
+            os.close(fd)
+            try:
+                shutil.copyfile(file_path, private_copy)
+                os.replace(private_copy, file_path)
+            except OSError:
+                os.unlink(private_copy)
+                raise
+        os.chmod(file_path, st.st_mode | 0o755)
 
     def is_available(self):
         try:
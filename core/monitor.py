@@ -1,20 +1,31 @@
 import os
+import re
 import time
-import json
 import psutil
 import threading
-import platform
 from datetime import datetime
+from functools import lru_cache
 
 from saferun.config import settings
 from saferun.utils.logger import LogManager
+from saferun.utils import json_utils
+
+
+@lru_cache(maxsize=None)
+def _compile_patterns(patterns):
+    """Compile a tuple of literal substrings into one alternation regex, shared across monitors."""
+    return re.compile("|".join(re.escape(p) for p in patterns))
+
+
+# Poll quickly while the process keeps producing new events, back off while it is idle
+_ACTIVE_POLL_INTERVAL = 0.25
+_IDLE_POLL_INTERVAL = 2.0
 
 
 class ProcessMonitor:
     def __init__(self, sandbox_id):
         self.logger = LogManager().get_logger("monitor")
         self.sandbox_id = sandbox_id
-        self.platform = platform.system()
         self.monitoring = False
         self.monitoring_thread = None
         self.log_dir = os.path.join(settings.LOG_DIR, sandbox_id)
@@ -27,6 +38,10 @@ class ProcessMonitor:
             "network_connections": [],
             "registry_activities": [],
         }
+        self._seen_paths = set()
+        self._seen_remotes = set()
+        self._seen_dlls = set()
+        self._advapi_seen = False
 
         self.suspicious_patterns = {
             "files": ["C:\\Windows\\System32\\config", "/etc/passwd"],
@@ -36,6 +51,8 @@ class ProcessMonitor:
                 "HKEY_CURRENT_USER\\Software\\Microsoft\\Windows\\CurrentVersion\\Run"
             ]
         }
+        self._file_re = _compile_patterns(tuple(self.suspicious_patterns["files"]))
+        self._network_re = _compile_patterns(tuple(self.suspicious_patterns["network"]))
 
         self.logger.info(f"Process monitor initialized for sandbox {sandbox_id}")
 
@@ -45,6 +62,13 @@ class ProcessMonitor:
             return self.monitoring_data
 
         self.pid = pid
+        # A monitor may be reused; start each run from empty results
+        self.threat_score = 0
+        self.monitoring_data = {
+            "file_accesses": [],
+            "network_connections": [],
+            "registry_activities": [],
+        }
         try:
             process = psutil.Process(self.pid)
             if not process.is_running():
@@ -68,9 +92,13 @@ class ProcessMonitor:
             self.monitoring_thread.join(timeout=5)
 
         self.monitoring_data["threat_score"] = self.threat_score
+        self._seen_paths.clear()
+        self._seen_remotes.clear()
+        self._seen_dlls.clear()
+        self._advapi_seen = False
+        self._format_timestamps()
         log_file = os.path.join(self.log_dir, f"monitor_{self.pid}.json")
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(self.monitoring_data, f)
+        json_utils.dump_to_file(self.monitoring_data, log_file)
 
         self.logger.info(f"Stopped monitoring process {self.pid}, log saved to {log_file}")
 
@@ -81,10 +109,17 @@ class ProcessMonitor:
 
         # ✅ ADDED: Print to console for Process Monitor section
         print("\n[Process Monitor Output]")
-        print(json.dumps(self.monitoring_data, indent=2))
+        print(json_utils.dumps(self.monitoring_data, indent=True))
 
         return self.monitoring_data
 
+    def _format_timestamps(self):
+        # Events are stamped with epoch floats while sampling; render them once here
+        for key in ("file_accesses", "network_connections", "registry_activities"):
+            for event in self.monitoring_data.get(key, []):
+                if isinstance(event.get("timestamp"), float):
+                    event["timestamp"] = datetime.fromtimestamp(event["timestamp"]).isoformat()
+
     def _monitor_process(self):
         try:
             process = psutil.Process(self.pid)
@@ -99,12 +134,15 @@ class ProcessMonitor:
                     self.logger.info(f"Process {self.pid} has terminated")
                     break
 
-                self._monitor_file_activity(process)
-                self._monitor_network_activity(process)
-                if self.platform == "Windows":
-                    self._monitor_registry_activity(process)
+                events_before = self._event_count()
+                with process.oneshot():
+                    self._monitor_file_activity(process)
+                    self._monitor_network_activity(process)
+                    if settings.PLATFORM == "Windows":
+                        self._monitor_registry_activity(process)
 
-                time.sleep(1)
+                active = self._event_count() > events_before
+                time.sleep(_ACTIVE_POLL_INTERVAL if active else _IDLE_POLL_INTERVAL)
 
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 break
@@ -112,18 +150,21 @@ class ProcessMonitor:
                 self.logger.error(f"Error monitoring process: {e}")
                 break
 
+    def _event_count(self):
+        return len(self._seen_paths) + len(self._seen_remotes) + len(self._seen_dlls)
+
     def _monitor_file_activity(self, process):
         try:
             for file in process.open_files():
                 path = file.path
-                if not any(f["path"] == path for f in self.monitoring_data["file_accesses"]):
+                if path not in self._seen_paths:
+                    self._seen_paths.add(path)
                     self.monitoring_data["file_accesses"].append({
-                        "timestamp": datetime.now().isoformat(),
+                        "timestamp": time.time(),
                         "path": path
                     })
-                    for pattern in self.suspicious_patterns["files"]:
-                        if pattern in path:
-                            self.threat_score += 10
+                    if self._file_re.search(path):
+                        self.threat_score += 10
         except Exception:
             pass
 
@@ -132,26 +173,32 @@ class ProcessMonitor:
             for conn in process.connections(kind="inet"):
                 if conn.status == "ESTABLISHED" and conn.raddr:
                     remote = f"{conn.raddr.ip}:{conn.raddr.port}"
-                    if not any(n["remote"] == remote for n in self.monitoring_data["network_connections"]):
+                    if remote not in self._seen_remotes:
+                        self._seen_remotes.add(remote)
                         self.monitoring_data["network_connections"].append({
-                            "timestamp": datetime.now().isoformat(),
+                            "timestamp": time.time(),
                             "remote": remote
                         })
-                    for pattern in self.suspicious_patterns["network"]:
-                        if pattern in remote:
-                            self.threat_score += 20
+                    if self._network_re.search(remote):
+                        self.threat_score += 20
         except Exception:
             pass
 
     def _monitor_registry_activity(self, process):
+        # A loaded DLL stays mapped, so the memory map only needs walking until advapi32 shows up
+        if self._advapi_seen:
+            return
         try:
             dlls = process.memory_maps()
             for dll in dlls:
-                path = dll.path.lower()
-                if "advapi32.dll" in path:
-                    if not any(r.get("dll") == path for r in self.monitoring_data["registry_activities"]):
+                # Only lowercase the file-name suffix rather than every full path
+                if dll.path[-12:].lower() == "advapi32.dll":
+                    self._advapi_seen = True
+                    path = dll.path.lower()
+                    if path not in self._seen_dlls:
+                        self._seen_dlls.add(path)
                         self.monitoring_data["registry_activities"].append({
-                            "timestamp": datetime.now().isoformat(),
+                            "timestamp": time.time(),
                             "dll": path,
                             "key": self.suspicious_patterns["registry"][0]
                         })
@@ -5,6 +5,11 @@ import shutil
 import subprocess
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 from saferun.config import settings
 from saferun.core.monitor import ProcessMonitor
 from saferun.core.threat_detector import ThreatDetector
@@ -12,30 +17,100 @@ from saferun.utils.file_analyzer import FileAnalyzer
 from saferun.utils.logger import LogManager
 from saferun.core.isolation import get_isolation_environment
 
+# ioctl request for a copy-on-write clone of a whole file (btrfs, xfs)
+FICLONE = 0x40049409
+
 
 class Sandbox:
     def __init__(self, isolation_method="container", security_level="medium"):
         self.logger = LogManager().get_logger("sandbox")
         self.security_level = security_level
+        self.requested_security_level = security_level
         self.isolation_method = isolation_method
         self.sandbox_id = str(uuid.uuid4())
         self.sandbox_dir = os.path.join(settings.SANDBOX_DIR, self.sandbox_id)
-        self.file_analyzer = FileAnalyzer()
-        self.threat_detector = ThreatDetector(security_level, isolation_method)
-        self.process_monitor = ProcessMonitor(self.sandbox_id)
-        self.isolation_env = get_isolation_environment(isolation_method, security_level)
+        self._files_dir = os.path.join(self.sandbox_dir, "files")
+        self._file_analyzer = None
+        self._threat_detector = None
+        self._process_monitor = None
+        self._isolation_env = None
+        self._isolation_level = None
+
+        os.makedirs(self._files_dir, exist_ok=True)
+        self._files_dir_ready = True
+
+        self.hardlink_staging = False
+        try:
+            self.hardlink_staging = settings.load_config().get("sandbox", {}).get("hardlink_staged_files", False)
+        except Exception as e:
+            self.logger.warning(f"Failed to load staging config: {e}")
 
-        os.makedirs(self.sandbox_dir, exist_ok=True)
         self.logger.info(f"Sandbox initialized with ID: {self.sandbox_id} using {isolation_method} isolation")
 
+    # Components are built on first use so short-lived sandboxes skip their setup cost.
+    # The level-dependent ones are rebuilt when execute_file() changes the
+    # effective security level for the file being run.
+
+    @property
+    def file_analyzer(self):
+        if self._file_analyzer is None:
+            self._file_analyzer = FileAnalyzer()
+        return self._file_analyzer
+
+    @property
+    def threat_detector(self):
+        if self._threat_detector is None or self._threat_detector.security_level != self.security_level:
+            self._threat_detector = ThreatDetector(self.security_level, self.isolation_method)
+        return self._threat_detector
+
+    @property
+    def process_monitor(self):
+        if self._process_monitor is None:
+            self._process_monitor = ProcessMonitor(self.sandbox_id)
+        return self._process_monitor
+
+    @property
+    def isolation_env(self):
+        if self._isolation_env is not None and self._isolation_level != self.security_level:
+            self._isolation_env.cleanup()
+            self._isolation_env = None
+        if self._isolation_env is None:
+            self._isolation_env = get_isolation_environment(self.isolation_method, self.security_level)
+            self._isolation_level = self.security_level
+        return self._isolation_env
+
     def _prepare_file(self, file_path):
-        dest_dir = os.path.join(self.sandbox_dir, "files")
-        os.makedirs(dest_dir, exist_ok=True)
+        # The directory only needs recreating after cleanup() has removed it
+        if not self._files_dir_ready:
+            os.makedirs(self._files_dir, exist_ok=True)
+            self._files_dir_ready = True
         file_name = os.path.basename(file_path)
-        dest_file_path = os.path.join(dest_dir, file_name)
-        shutil.copy(file_path, dest_file_path)
+        dest_file_path = os.path.join(self._files_dir, file_name)
+        # Never write through a stale hardlink that still points at a source file
+        if os.path.lexists(dest_file_path):
+            os.remove(dest_file_path)
+        self._stage_file(file_path, dest_file_path)
         return dest_file_path
 
+    def _stage_file(self, src, dest):
+        # Hardlinks share the inode with the source, so they are opt-in only
+        if self.hardlink_staging:
+            try:
+                os.link(src, dest)
+                return
+            except OSError:
+                pass
+
+        if fcntl is not None and settings.PLATFORM == "Linux":
+            try:
+                with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+                    fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+                return
+            except OSError:
+                pass
+
+        shutil.copyfile(src, dest)
+
     def _execute_in_container(self, file_path, timeout):
         try:
             result = self.isolation_env.execute(file_path)
@@ -83,6 +158,8 @@ class Sandbox:
 
     def execute_file(self, file_path, timeout=300, monitor=True):
         start_time = time.time()
+        # Elevation below applies per file, not to later files run in the same sandbox
+        self.security_level = self.requested_security_level
 
         # ✅ Static analysis
         analysis_result = self.file_analyzer.analyze(file_path)
@@ -112,14 +189,9 @@ class Sandbox:
                     except subprocess.TimeoutExpired:
                         self._terminate_execution(execution_result)
 
-                # ✅ Monitor output
+                # ✅ Monitor output (stop_monitoring also prints it to the console)
                 monitor_results = self.process_monitor.stop_monitoring()
 
-                # ✅ Print to console
-                import json
-                print("\n[Process Monitor Output]")
-                print(json.dumps(monitor_results, indent=2))
-
         # ✅ Dynamic analysis
         dynamic_analysis = self.threat_detector.analyze_report(monitor_results)
         dynamic_score = dynamic_analysis.get("threat_score", 0)
@@ -152,15 +224,32 @@ class Sandbox:
             "registry_operations": monitor_results.get("registry_operations", []),
         }
 
-        self.cleanup()
+        # The sandbox stays up for the next file; cleanup() runs when its owner is done with it
+        self._finish_file(sandbox_file_path)
         self.logger.info(f"Execution completed for file {file_path} with threat score {total_threat_score}")
         return report
 
+    def _finish_file(self, sandbox_file_path):
+        # Stop anything the file left running before its staged copy goes away
+        if self._isolation_env is not None:
+            try:
+                self._isolation_env.reset()
+            except Exception as e:
+                self.logger.warning(f"Failed to reset isolation environment: {e}")
+        try:
+            os.remove(sandbox_file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Failed to remove staged file {sandbox_file_path}: {e}")
+
     def cleanup(self):
         try:
             if os.path.exists(self.sandbox_dir):
                 shutil.rmtree(self.sandbox_dir)
+                self._files_dir_ready = False
                 self.logger.info(f"Temporary files removed from {self.sandbox_dir}")
-            self.isolation_env.cleanup()
+            if self._isolation_env is not None:
+                self._isolation_env.cleanup()
         except Exception as e:
             self.logger.warning(f"Failed to clean up sandbox: {e}")
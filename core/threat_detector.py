@@ -1,9 +1,13 @@
 import os
-import json
+import mmap
 import platform
+import ahocorasick
 from enum import Enum
 from typing import List, Dict, Any, Optional
-from saferun.core.isolation import get_isolation_environment
+from saferun.config import settings
+from saferun.utils import json_utils
+
+_THIS_PLATFORM = platform.system().lower()
 
 
 class ThreatLevel(Enum):
@@ -24,6 +28,48 @@ class ThreatLevel(Enum):
         }.get(level_str.lower(), cls.NONE)
 
 
+# Score contributed by a single match at each threat level
+_WEIGHTS = {
+    ThreatLevel.CRITICAL: 1.0,
+    ThreatLevel.HIGH: 0.4,
+    ThreatLevel.MEDIUM: 0.2,
+    ThreatLevel.LOW: 0.1
+}
+
+# Byte patterns searched for in static file analysis
+_KEYWORDS = [
+    (b"cmd.exe", ThreatLevel.MEDIUM),
+    (b"powershell", ThreatLevel.MEDIUM),
+    (b"CreateProcess", ThreatLevel.HIGH),
+    (b"WriteProcessMemory", ThreatLevel.HIGH),
+    (b"curl", ThreatLevel.LOW),
+    (b"wget", ThreatLevel.LOW),
+    (b"socket", ThreatLevel.MEDIUM),
+    (b"registry", ThreatLevel.MEDIUM),
+    (b"os.system", ThreatLevel.MEDIUM),
+    (b"eval", ThreatLevel.HIGH),
+    (b"exec", ThreatLevel.HIGH),
+    (b"malicious.example.com", ThreatLevel.HIGH)
+]
+
+# Files at least this large are memory-mapped and scanned in fixed-size windows
+_MMAP_THRESHOLD = 64 * 1024
+_SCAN_CHUNK = 1024 * 1024
+_KEYWORD_OVERLAP = max(len(kw) for kw, _ in _KEYWORDS) - 1
+
+
+def _build_keyword_automaton():
+    automaton = ahocorasick.Automaton()
+    for kw, level in _KEYWORDS:
+        automaton.add_word(kw.decode('latin1'), (kw, level))
+    automaton.make_automaton()
+    return automaton
+
+
+# The keyword set is fixed, so every detector shares one automaton built at import
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
 class ThreatSignature:
     def __init__(self, id: str, name: str, description: str, indicators: List[str],
                  severity: ThreatLevel, category: str, platforms: List[str]):
@@ -34,6 +80,10 @@ class ThreatSignature:
         self.severity = severity if isinstance(severity, ThreatLevel) else ThreatLevel.from_string(severity)
         self.category = category
         self.platforms = platforms
+        self._platform_set = frozenset(p.lower() for p in platforms)
+
+    def applies_to(self, platform_name: str) -> bool:
+        return "all" in self._platform_set or platform_name in self._platform_set
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ThreatSignature':
@@ -51,9 +101,9 @@ class ThreatSignature:
 class ThreatDetector:
     def __init__(self, security_level: str = "medium", isolation_method: Optional[str] = None):
         self.signatures: List[ThreatSignature] = []
+        self._automaton = ahocorasick.Automaton()
         self.security_level = security_level
         self.isolation_method = isolation_method or "container"
-        self.isolation_env = get_isolation_environment(self.isolation_method, self.security_level)
 
         self.detection_sensitivity = {
             "low": 0.3,
@@ -93,6 +143,21 @@ class ThreatDetector:
                 platforms=["all"]
             )
         ])
+        self._build_automaton()
+
+    def _build_automaton(self):
+        """Index the indicators of every signature for this platform in a single Aho-Corasick automaton."""
+        self._automaton = ahocorasick.Automaton()
+        for sig_idx, sig in enumerate(self.signatures):
+            if not sig.applies_to(_THIS_PLATFORM):
+                continue
+            for indicator in sig.indicators:
+                key = indicator.lower()
+                matches = self._automaton.get(key, [])
+                matches.append((sig_idx, indicator))
+                self._automaton.add_word(key, matches)
+        if len(self._automaton):
+            self._automaton.make_automaton()
 
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
         score = 0.0
@@ -108,33 +173,17 @@ class ThreatDetector:
             threats.append({"type": "script", "details": ext, "confidence": 0.6})
 
         try:
+            size = os.path.getsize(file_path)
             with open(file_path, 'rb') as f:
-                content = f.read()
-
-            keywords = [
-                (b"cmd.exe", ThreatLevel.MEDIUM),
-                (b"powershell", ThreatLevel.MEDIUM),
-                (b"CreateProcess", ThreatLevel.HIGH),
-                (b"WriteProcessMemory", ThreatLevel.HIGH),
-                (b"curl", ThreatLevel.LOW),
-                (b"wget", ThreatLevel.LOW),
-                (b"socket", ThreatLevel.MEDIUM),
-                (b"registry", ThreatLevel.MEDIUM),
-                (b"os.system", ThreatLevel.MEDIUM),
-                (b"eval", ThreatLevel.HIGH),
-                (b"exec", ThreatLevel.HIGH),
-                (b"malicious.example.com", ThreatLevel.HIGH)
-            ]
-
-            for kw, level in keywords:
-                if kw in content:
-                    weight = {
-                        ThreatLevel.CRITICAL: 1.0,
-                        ThreatLevel.HIGH: 0.4,
-                        ThreatLevel.MEDIUM: 0.2,
-                        ThreatLevel.LOW: 0.1
-                    }.get(level, 0.1)
-                    score += weight
+                if size < _MMAP_THRESHOLD:
+                    seen = self._find_keywords(f.read())
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                        seen = self._find_keywords(content)
+
+            for kw, level in _KEYWORDS:
+                if kw in seen:
+                    score += _WEIGHTS.get(level, 0.1)
                     threats.append({"type": "keyword", "details": kw.decode(errors='ignore'), "level": level.name})
 
         except Exception as e:
@@ -145,6 +194,17 @@ class ThreatDetector:
             "threats": threats
         }
 
+    def _find_keywords(self, content) -> set:
+        """Return the keywords present in a bytes-like object, scanning it window by window."""
+        seen = set()
+        for start in range(0, len(content), _SCAN_CHUNK):
+            # Windows overlap by the longest keyword so matches spanning a boundary are kept.
+            # latin1 maps every byte to one code point, so matches are exact byte matches.
+            chunk = content[start:start + _SCAN_CHUNK + _KEYWORD_OVERLAP]
+            for _, (kw, _level) in _KEYWORD_AUTOMATON.iter(chunk.decode('latin1')):
+                seen.add(kw)
+        return seen
+
     def analyze_report(self, report: Dict[str, Any]) -> Dict[str, Any]:
         threat_score = 0.0
         threats = []
@@ -154,38 +214,43 @@ class ThreatDetector:
         network_ops = report.get("network_activity", [])
         registry_ops = report.get("registry_operations", [])
 
+        # Nothing was observed (e.g. container runs), so there is nothing to match
+        if not (file_ops or network_ops or registry_ops):
+            return {"threat_score": 0.0, "threats": []}
+
         all_entries = file_ops + network_ops + registry_ops
 
         for entry in all_entries:
-            data_str = json.dumps(entry).lower()
-            for sig in self.signatures:
-                if platform.system().lower() not in [p.lower() for p in sig.platforms] and "all" not in sig.platforms:
-                    continue
-                for indicator in sig.indicators:
-                    if indicator.lower() in data_str:
-                        threat_score += {
-                            ThreatLevel.CRITICAL: 1.0,
-                            ThreatLevel.HIGH: 0.4,
-                            ThreatLevel.MEDIUM: 0.2,
-                            ThreatLevel.LOW: 0.1
-                        }.get(sig.severity, 0.1)
-                        threats.append({
-                            "signature_id": sig.id,
-                            "signature_name": sig.name,
-                            "threat_level": sig.severity.name,
-                            "category": sig.category,
-                            "details": indicator
-                        })
-                        break
+            # Collect every indicator hit across the entry's values, then report
+            # the first indicator (in declaration order) for each matching signature
+            hits: Dict[int, set] = {}
+            if self._automaton.kind == ahocorasick.AHOCORASICK:
+                for value in entry.values():
+                    for _, matches in self._automaton.iter(str(value).lower()):
+                        for sig_idx, indicator in matches:
+                            hits.setdefault(sig_idx, set()).add(indicator)
+
+            for sig_idx in sorted(hits):
+                sig = self.signatures[sig_idx]
+                indicator = next(i for i in sig.indicators if i in hits[sig_idx])
+                threat_score += _WEIGHTS.get(sig.severity, 0.1)
+                threats.append({
+                    "signature_id": sig.id,
+                    "signature_name": sig.name,
+                    "threat_level": sig.severity.name,
+                    "category": sig.category,
+                    "details": indicator
+                })
 
         result = {
             "threat_score": min(threat_score, 1.0),
             "threats": threats
         }
 
-        # ✅ ADDED: Console output for analysis section
-        print("\n[Analysis Report Output]")
-        print(json.dumps(result, indent=2))
+        # ✅ ADDED: Console output for analysis section (set SAFERUN_DEBUG=1 to enable)
+        if settings.DEBUG_OUTPUT:
+            print("\n[Analysis Report Output]")
+            print(json_utils.dumps(result, indent=True))
 
         return result
 
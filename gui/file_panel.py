@@ -1,75 +1,199 @@
 import os
-import threading
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import partial
 
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QListWidget, QListWidgetItem,
+from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QListView, QStyle, QStyledItemDelegate,
                              QComboBox, QProgressBar, QMessageBox, QFileDialog)
-from PyQt6.QtCore import Qt, pyqtSignal, QSize
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QRect, QTimer, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QIcon, QColor, QFont, QFontMetrics, QPalette
 
 from saferun.config import settings
 from saferun.core.sandbox import Sandbox
 from saferun.utils.file_analyzer import FileAnalyzer
+from saferun.utils.logger import forward_worker_logs, init_worker_logging
 
 
-class FileItemWidget(QWidget):
-    """Custom widget for file list items"""
+# Sandboxes owned by this worker process, keyed by (security_level, isolation_method)
+_SANDBOXES = {}
 
-    def __init__(self, file_path, parent=None):
-        super().__init__(parent)
-        self.file_path = file_path
-        self.file_name = os.path.basename(file_path)
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
-
-        # File icon (simple implementation - would use file type icons in production)
-        icon_label = QLabel()
-        file_ext = os.path.splitext(file_path)[1].lower()
-        icon_name = "file-icon.png"
-        if file_ext in ['.exe', '.msi']:
-            icon_name = "executable-icon.png"
-        elif file_ext in ['.pdf', '.doc', '.docx']:
-            icon_name = "document-icon.png"
-        elif file_ext in ['.py', '.js', '.sh']:
-            icon_name = "script-icon.png"
-
-        icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                 "resources", "icons", icon_name)
-        if os.path.exists(icon_path):
-            icon_label.setPixmap(QIcon(icon_path).pixmap(QSize(24, 24)))
-        layout.addWidget(icon_label)
-
-        # File info
-        file_info = QVBoxLayout()
-        file_name_label = QLabel(f"<b>{self.file_name}</b>")
-        file_path_label = QLabel(file_path)
-        file_path_label.setStyleSheet("color: gray; font-size: 9pt;")
-
-        file_info.addWidget(file_name_label)
-        file_info.addWidget(file_path_label)
-        layout.addLayout(file_info, 1)
-
-        # Status indicator
-        self.status_label = QLabel("Ready")
-        layout.addWidget(self.status_label)
 
-        # Analyze button
-        self.analyze_button = QPushButton("Analyze")
-        layout.addWidget(self.analyze_button)
+def _cleanup_sandboxes():
+    for sandbox in _SANDBOXES.values():
+        sandbox.cleanup()
+    _SANDBOXES.clear()
 
-        self.setLayout(layout)
 
-    def set_status(self, status):
-        self.status_label.setText(status)
-        color_map = {
-            "Safe": "green",
-            "Malicious": "red",
-            "Suspicious": "orange",
-            "Scanning...": "blue"
-        }
-        self.status_label.setStyleSheet(f"color: {color_map.get(status, 'black')}; font-weight: bold;")
+def _scan_file_worker(file_path, security_level, isolation_method):
+    """Run a single file through this worker's sandbox (executes in a worker process)"""
+    key = (security_level, isolation_method)
+    sandbox = _SANDBOXES.get(key)
+    if sandbox is None:
+        if not _SANDBOXES:
+            atexit.register(_cleanup_sandboxes)
+        sandbox = Sandbox(security_level=security_level, isolation_method=isolation_method)
+        _SANDBOXES[key] = sandbox
+    return sandbox.execute_file(file_path)
+
+
+# Custom item data roles for the file list model
+PathRole = Qt.ItemDataRole.UserRole + 1
+StatusRole = Qt.ItemDataRole.UserRole + 2
+
+
+# Icon files shipped with the GUI package
+_ICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "icons")
+
+# File extension -> icon file, built once at import
+_EXT_TO_ICON = {
+    '.exe': "executable-icon.png",
+    '.msi': "executable-icon.png",
+    '.pdf': "document-icon.png",
+    '.doc': "document-icon.png",
+    '.docx': "document-icon.png",
+    '.py': "script-icon.png",
+    '.js': "script-icon.png",
+    '.sh': "script-icon.png",
+}
+_DEFAULT_ICON = "file-icon.png"
+
+
+def _icon_name_for(file_path):
+    """Pick the icon file for a path based on its extension"""
+    return _EXT_TO_ICON.get(os.path.splitext(file_path)[1].lower(), _DEFAULT_ICON)
+
+
+class FileListModel(QAbstractListModel):
+    """List model holding (path, status) rows for the file panel"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._rows_by_path = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        file_path, status = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(file_path)
+        if role in (PathRole, Qt.ItemDataRole.ToolTipRole):
+            return file_path
+        if role == StatusRole:
+            return status
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != StatusRole:
+            return False
+        self._rows[index.row()][1] = value
+        self.dataChanged.emit(index, index, [StatusRole])
+        return True
+
+    def add_file(self, file_path):
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append([file_path, "Ready"])
+        self._rows_by_path.setdefault(file_path, row)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._rows_by_path = {}
+        self.endResetModel()
+
+    def file_path(self, row):
+        return self._rows[row][0]
+
+    def set_status(self, file_path, status):
+        row = self._rows_by_path.get(file_path)
+        if row is not None:
+            self.setData(self.index(row), status, StatusRole)
+
+
+class FileItemDelegate(QStyledItemDelegate):
+    """Paints file rows (icon, name, path and status) without per-row widgets"""
+
+    ROW_HEIGHT = 48
+    ICON_SIZE = 24
+    STATUS_COLORS = {
+        "Safe": "green",
+        "Malicious": "red",
+        "Suspicious": "orange",
+        "Scanning...": "blue"
+    }
+
+    # Scaled icon pixmaps keyed by icon file name; None when the icon is missing
+    _ICON_CACHE = {}
+
+    @classmethod
+    def _get_icon(cls, icon_name):
+        if icon_name not in cls._ICON_CACHE:
+            icon_path = os.path.join(_ICONS_DIR, icon_name)
+            pixmap = None
+            if os.path.exists(icon_path):
+                pixmap = QIcon(icon_path).pixmap(QSize(cls.ICON_SIZE, cls.ICON_SIZE))
+            cls._ICON_CACHE[icon_name] = pixmap
+        return cls._ICON_CACHE[icon_name]
+
+    def paint(self, painter, option, index):
+        painter.save()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+
+        rect = option.rect.adjusted(5, 5, -5, -5)
+        file_path = index.data(PathRole)
+        file_name = index.data(Qt.ItemDataRole.DisplayRole)
+        status = index.data(StatusRole)
+
+        # File icon
+        pixmap = self._get_icon(_icon_name_for(file_path))
+        if pixmap is not None:
+            painter.drawPixmap(rect.left(), rect.top() + (rect.height() - self.ICON_SIZE) // 2, pixmap)
+        text_left = rect.left() + self.ICON_SIZE + 6
+
+        # Status indicator, right-aligned
+        status_font = QFont(option.font)
+        status_font.setBold(True)
+        status_width = QFontMetrics(status_font).horizontalAdvance(status)
+        status_rect = QRect(rect.right() - status_width, rect.top(), status_width, rect.height())
+        painter.setFont(status_font)
+        painter.setPen(QColor(self.STATUS_COLORS.get(status, "black")))
+        painter.drawText(status_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, status)
+
+        # File name over the full path
+        text_width = max(status_rect.left() - 10 - text_left, 0)
+        half = rect.height() // 2
+        name_font = QFont(option.font)
+        name_font.setBold(True)
+        painter.setFont(name_font)
+        painter.setPen(option.palette.color(QPalette.ColorRole.Text))
+        name_metrics = QFontMetrics(name_font)
+        painter.drawText(QRect(text_left, rect.top(), text_width, half),
+                         Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                         name_metrics.elidedText(file_name, Qt.TextElideMode.ElideRight, text_width))
+
+        path_font = QFont(option.font)
+        path_font.setPointSize(9)
+        painter.setFont(path_font)
+        painter.setPen(QColor("gray"))
+        path_metrics = QFontMetrics(path_font)
+        painter.drawText(QRect(text_left, rect.top() + half, text_width, rect.height() - half),
+                         Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                         path_metrics.elidedText(file_path, Qt.TextElideMode.ElideMiddle, text_width))
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
 
 
 class FilePanel(QWidget):
@@ -79,10 +203,23 @@ class FilePanel(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.file_analyzer = FileAnalyzer()
+        self.executor = None
+        # Workers log through this queue so only this process writes the log files
+        self._log_queue = None
+        # Set from an executor thread when a worker died; the pool is rebuilt before the next scan
+        self._executor_broken = False
+        self._scanning = False
+        self._last_dir = ""
+        self._scan_total = 0
+        self._scanned = 0
+        self._pending_results = []
         self.init_ui()
 
         # Connect signals
         self.scan_complete_signal.connect(self.on_scan_complete)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown_executor)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -126,7 +263,11 @@ class FilePanel(QWidget):
         layout.addLayout(top_controls)
 
         # File list
-        self.file_list = QListWidget()
+        self.file_model = FileListModel(self)
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_model)
+        self.file_list.setItemDelegate(FileItemDelegate(self.file_list))
+        self.file_list.setUniformItemSizes(True)
         self.file_list.setMinimumHeight(200)
         layout.addWidget(QLabel("<b>Files to Analyze:</b>"))
         layout.addWidget(self.file_list)
@@ -140,6 +281,12 @@ class FilePanel(QWidget):
 
         layout.addLayout(progress_layout)
 
+        # Completed scans are applied in batches rather than one repaint per file
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush_scan_results)
+
         # Action buttons
         button_layout = QHBoxLayout()
         button_layout.addStretch(1)
@@ -161,48 +308,78 @@ class FilePanel(QWidget):
         self.setLayout(layout)
 
     def browse_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File to Analyze")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File to Analyze", self._last_dir)
         if file_path:
+            self._last_dir = os.path.dirname(file_path)
             self.add_file(file_path)
 
     def add_file(self, file_path):
-        file_item = QListWidgetItem()
-        widget = FileItemWidget(file_path)
-        file_item.setSizeHint(widget.sizeHint())
-        self.file_list.addItem(file_item)
-        self.file_list.setItemWidget(file_item, widget)
+        self.file_model.add_file(file_path)
 
     def clear_file_list(self):
-        self.file_list.clear()
+        self.file_model.clear()
+
+    def _get_executor(self):
+        # Worker processes sidestep the GIL; the pool is kept alive across scans
+        # unless a worker died, which breaks it for good.
+        # Spawn (not fork) so workers don't inherit the Qt event loop state.
+        if self.executor is not None and self._executor_broken:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.executor is None:
+            mp_context = multiprocessing.get_context("spawn")
+            if self._log_queue is None:
+                self._log_queue = forward_worker_logs(mp_context)
+            self.executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=mp_context,
+                initializer=init_worker_logging,
+                initargs=(self._log_queue,)
+            )
+            self._executor_broken = False
+        return self.executor
+
+    def shutdown_executor(self):
+        # Drop queued scans instead of running them all before the app can exit
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
 
     def scan_all_files(self):
-        total = self.file_list.count()
+        total = self.file_model.rowCount()
         if total == 0:
             QMessageBox.warning(self, "No Files", "No files to scan.")
             return
+        if self._scanning:
+            QMessageBox.warning(self, "Scan Running", "Please wait for the current scan to finish.")
+            return
 
+        self.progress_bar.setRange(0, total)
         self.progress_bar.setValue(0)
         self.status_label.setText("Scanning in progress...")
-        scanned = 0
-
-        for index in range(total):
-            item = self.file_list.item(index)
-            widget = self.file_list.itemWidget(item)
-            if not widget:
-                continue
-
-            widget.set_status("Scanning...")
-
-            thread = threading.Thread(target=self._scan_file, args=(widget, index, total))
-            thread.start()
 
-    def _scan_file(self, widget, index, total):
+        security_level = self.security_level.currentText().lower()
+        isolation_method = self.isolation_method.currentText().lower()
+        self._scan_total = total
+        self._scanned = 0
+        self._scanning = True
+
+        for row in range(total):
+            file_path = self.file_model.file_path(row)
+            self.file_model.setData(self.file_model.index(row), "Scanning...", StatusRole)
+
+            try:
+                future = self._get_executor().submit(_scan_file_worker, file_path, security_level, isolation_method)
+            except BrokenProcessPool:
+                # A worker died since the last check; start over with a fresh pool
+                self._executor_broken = True
+                future = self._get_executor().submit(_scan_file_worker, file_path, security_level, isolation_method)
+            future.add_done_callback(partial(self._on_scan_done, file_path))
+
+    def _on_scan_done(self, file_path, future):
+        # Runs on an executor thread; the signal hands the result to the GUI thread
         try:
-            sandbox = Sandbox(
-                security_level=self.security_level.currentText().lower(),
-                isolation_method=self.isolation_method.currentText().lower()
-            )
-            report = sandbox.execute_file(widget.file_path)
+            report = future.result()
             score = report.get("threat_level", 0)
             status = "Safe"
             if score >= 0.7:
@@ -210,18 +387,30 @@ class FilePanel(QWidget):
             elif score >= 0.3:
                 status = "Suspicious"
         except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._executor_broken = True
             status = f"Error: {e}"
-        finally:
-            self.scan_complete_signal.emit(widget.file_path, {"status": status})
-            progress = int((index + 1) / total * 100)
-            self.progress_bar.setValue(progress)
-            if progress == 100:
-                self.status_label.setText("Scan completed successfully.")
+        self.scan_complete_signal.emit(file_path, {"status": status})
 
     def on_scan_complete(self, file_path, result):
-        for index in range(self.file_list.count()):
-            item = self.file_list.item(index)
-            widget = self.file_list.itemWidget(item)
-            if widget and widget.file_path == file_path:
-                widget.set_status(result.get("status", "Unknown"))
-                break
+        self._pending_results.append((file_path, result))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_scan_results(self):
+        pending, self._pending_results = self._pending_results, []
+        if not pending:
+            return
+
+        self.file_list.setUpdatesEnabled(False)
+        try:
+            for file_path, result in pending:
+                self.file_model.set_status(file_path, result.get("status", "Unknown"))
+        finally:
+            self.file_list.setUpdatesEnabled(True)
+
+        self._scanned += len(pending)
+        self.progress_bar.setValue(self._scanned)
+        if self._scan_total and self._scanned >= self._scan_total:
+            self._scanning = False
+            self.status_label.setText("Scan completed successfully.")
@@ -1,53 +1,80 @@
 import os
 import sys
+import atexit
+import logging
+import threading
+from html import escape
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QPushButton, QTabWidget,
-    QFileDialog, QMessageBox, QListWidget, QProgressBar
+    QFileDialog, QMessageBox, QListWidget, QProgressBar, QTextBrowser
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 
 from saferun.config import settings
 from saferun.core.sandbox import Sandbox
 from saferun.utils.logger import LogManager
-from saferun.gui.report_panel import ReportPanel
 # Removed: from saferun.gui.monitor_panel import MonitorPanel
 # Removed: from saferun.core.monitor import ProcessMonitor
 
 
-class ScanWorker(QThread):
-    """Worker thread to perform scanning in the background"""
-    scan_progress = pyqtSignal(int)
-    scan_complete = pyqtSignal(dict)
-    scan_error = pyqtSignal(str)
+# Each pool thread keeps its own sandboxes, keyed by (isolation_method, security_level)
+_thread_state = threading.local()
+# Every sandbox created above, so they can all be cleaned up at exit
+_all_sandboxes = []
+_all_sandboxes_lock = threading.Lock()
 
-    def __init__(self, file_paths, isolation_method, security_level):
+
+def _cleanup_thread_sandboxes():
+    with _all_sandboxes_lock:
+        sandboxes = list(_all_sandboxes)
+        _all_sandboxes.clear()
+    for sandbox in sandboxes:
+        sandbox.cleanup()
+
+
+atexit.register(_cleanup_thread_sandboxes)
+
+
+def _thread_sandbox(isolation_method, security_level):
+    sandboxes = getattr(_thread_state, "sandboxes", None)
+    if sandboxes is None:
+        sandboxes = _thread_state.sandboxes = {}
+    key = (isolation_method, security_level)
+    if key not in sandboxes:
+        sandbox = Sandbox(isolation_method=isolation_method, security_level=security_level)
+        with _all_sandboxes_lock:
+            _all_sandboxes.append(sandbox)
+        sandboxes[key] = sandbox
+    return sandboxes[key]
+
+
+class ScanSignals(QObject):
+    """Signals emitted by ScanTask (QRunnable cannot define signals itself)"""
+    file_scanned = pyqtSignal(str, dict)
+    scan_error = pyqtSignal(str, str)
+
+
+class ScanTask(QRunnable):
+    """Scans a single file on the shared thread pool"""
+
+    def __init__(self, file_path, isolation_method, security_level, signals):
         super().__init__()
-        self.file_paths = file_paths
+        self.file_path = file_path
         self.isolation_method = isolation_method
         self.security_level = security_level
+        self.signals = signals
         self.logger = LogManager().get_logger("scan_worker")
 
     def run(self):
         try:
-            self.logger.info(f"Starting scan for {len(self.file_paths)} files")
-            sandbox = Sandbox(
-                isolation_method=self.isolation_method,
-                security_level=self.security_level
-            )
-            results = {}
-            total_files = len(self.file_paths)
-            for i, file_path in enumerate(self.file_paths):
-                self.scan_progress.emit(int((i / total_files) * 100))
-                self.logger.info(f"Scanning file: {file_path}")
-                report = sandbox.execute_file(file_path)
-                results[file_path] = report
-                sandbox.cleanup()
-            self.scan_progress.emit(100)
-            self.scan_complete.emit(results)
+            self.logger.info(f"Scanning file: {self.file_path}")
+            sandbox = _thread_sandbox(self.isolation_method, self.security_level)
+            report = sandbox.execute_file(self.file_path)
+            self.signals.file_scanned.emit(self.file_path, report)
         except Exception as e:
             self.logger.error(f"Scan error: {str(e)}")
-            self.scan_error.emit(str(e))
+            self.signals.scan_error.emit(self.file_path, str(e))
 
 
 class MainWindow(QMainWindow):
@@ -60,8 +87,20 @@ class MainWindow(QMainWindow):
         self.resize(1200, 800)
 
         self.files_to_scan = []
+        self._files_seen = set()
+        self._last_dir = ""
         self.scan_results = {}
-        self.current_worker = None
+        self._scan_files = []
+        self._scan_total = 0
+        self._scans_done = 0
+        self._scan_errors = []
+
+        # One pool for the whole app; each file is scanned as its own task
+        self.pool = QThreadPool.globalInstance()
+        self.pool.setMaxThreadCount(os.cpu_count() or 1)
+        self.scan_signals = ScanSignals()
+        self.scan_signals.file_scanned.connect(self.handle_file_scanned)
+        self.scan_signals.scan_error.connect(self.handle_scan_error)
 
         self.setup_ui()
         self.logger.info("GUI initialized")
@@ -126,6 +165,8 @@ class MainWindow(QMainWindow):
         self.result_tabs = QTabWidget()
         self.scan_results_widget = QWidget()
         self.scan_results_layout = QVBoxLayout(self.scan_results_widget)
+        self.results_browser = QTextBrowser()
+        self.scan_results_layout.addWidget(self.results_browser)
         self.result_tabs.addTab(self.scan_results_widget, "Scan Results")
 
         # REMOVED: Process Monitor tab
@@ -135,6 +176,8 @@ class MainWindow(QMainWindow):
 
         self.report_widget = QWidget()
         self.report_layout = QVBoxLayout(self.report_widget)
+        self.report_browser = QTextBrowser()
+        self.report_layout.addWidget(self.report_browser)
         self.result_tabs.addTab(self.report_widget, "Analysis Reports")
         main_layout.addWidget(self.result_tabs)
 
@@ -142,20 +185,24 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage("Ready")
 
     def add_files(self):
-        file_dialog = QFileDialog()
-        files, _ = file_dialog.getOpenFileNames(
-            self, "Select Files to Scan", "", "All Files (*.*)"
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select Files to Scan", self._last_dir, "All Files (*.*)"
         )
         if files:
+            self._last_dir = os.path.dirname(files[0])
+            new_paths = []
             for file_path in files:
-                if file_path not in self.files_to_scan:
-                    self.files_to_scan.append(file_path)
-                    self.file_list.addItem(file_path)
+                if file_path not in self._files_seen:
+                    self._files_seen.add(file_path)
+                    new_paths.append(file_path)
+            self.files_to_scan.extend(new_paths)
+            self.file_list.addItems(new_paths)
             self.statusBar().showMessage(f"{len(files)} file(s) added to scan list")
             self.logger.info(f"Added {len(files)} files to scan list")
 
     def clear_file_list(self):
         self.files_to_scan = []
+        self._files_seen.clear()
         self.file_list.clear()
         self.statusBar().showMessage("File list cleared")
         self.logger.info("File list cleared")
@@ -164,89 +211,142 @@ class MainWindow(QMainWindow):
         if not self.files_to_scan:
             QMessageBox.warning(self, "No Files", "Please add files to scan first.")
             return
+        if self._scans_done < self._scan_total:
+            QMessageBox.warning(self, "Scan Running", "Please wait for the current scan to finish.")
+            return
 
         isolation_method = self.isolation_combo.currentText().lower()
         security_level = self.security_combo.currentText().lower()
         self.clear_results()
 
-        self.current_worker = ScanWorker(
-            self.files_to_scan, isolation_method, security_level
-        )
-        self.current_worker.scan_progress.connect(self.update_progress)
-        self.current_worker.scan_complete.connect(self.handle_scan_complete)
-        self.current_worker.scan_error.connect(self.handle_scan_error)
+        self.scan_results = {}
+        self._scan_files = list(self.files_to_scan)
+        self._scan_total = len(self._scan_files)
+        self._scans_done = 0
+        self._scan_errors = []
+        self.logger.info(f"Starting scan for {self._scan_total} files")
 
         self.progress_bar.setValue(0)
         self.statusBar().showMessage("Scanning in progress...")
-        self.current_worker.start()
+        for file_path in self._scan_files:
+            self.pool.start(ScanTask(file_path, isolation_method, security_level, self.scan_signals))
 
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def _file_finished(self):
+        self._scans_done += 1
+        self.update_progress(int(self._scans_done / self._scan_total * 100))
+        if self._scans_done == self._scan_total:
+            # Present results in the order the files were queued
+            results = {p: self.scan_results[p] for p in self._scan_files if p in self.scan_results}
+            self.handle_scan_complete(results)
+
+    def handle_file_scanned(self, file_path, report):
+        self.scan_results[file_path] = report
+        self.display_result(file_path, report)
+        self._file_finished()
+
     def handle_scan_complete(self, results):
+        # Each file was already rendered as it finished
         self.scan_results = results
-        self.display_results()
-        self.statusBar().showMessage("Scan completed")
-        self.logger.info("Scan completed successfully")
-
-    def handle_scan_error(self, error_message):
-        QMessageBox.critical(self, "Scan Error", f"Error during scan: {error_message}")
-        self.statusBar().showMessage("Scan failed")
-        self.logger.error(f"Scan failed: {error_message}")
+        if self._scan_errors:
+            self.statusBar().showMessage(f"Scan completed with {len(self._scan_errors)} error(s)")
+            self.logger.info(f"Scan completed with {len(self._scan_errors)} error(s)")
+            self._show_scan_errors()
+        else:
+            self.statusBar().showMessage("Scan completed")
+            self.logger.info("Scan completed successfully")
+
+    def handle_scan_error(self, file_path, error_message):
+        # Reported together once the batch finishes rather than one dialog per file
+        self._scan_errors.append((file_path, error_message))
+        self.statusBar().showMessage(f"Scan failed for {os.path.basename(file_path)}")
+        self.logger.error(f"Scan failed for {file_path}: {error_message}")
+        self._file_finished()
+
+    def _show_scan_errors(self):
+        errors = self._scan_errors
+        message = QMessageBox(QMessageBox.Icon.Critical, "Scan Error",
+                              f"{len(errors)} of {self._scan_total} file(s) could not be scanned.",
+                              QMessageBox.StandardButton.Ok, self)
+        message.setDetailedText("\n".join(f"{os.path.basename(path)}: {error}" for path, error in errors))
+        message.exec()
 
     def clear_results(self):
-        for layout in [self.scan_results_layout, self.report_layout]:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-
-    def display_results(self):
-        if not self.scan_results:
-            return
-        for file_path, report in self.scan_results.items():
-            file_name = os.path.basename(file_path)
-            self.scan_results_layout.addWidget(QLabel(f"<b>File: {file_name}</b>"))
-            self.scan_results_layout.addWidget(QLabel(f"Status: {report.get('status', 'Unknown')}"))
-
-            exec_time = report.get("execution_time", 0)
-            self.scan_results_layout.addWidget(QLabel(f"Execution Time: {exec_time:.2f} seconds"))
-
-            score = report.get("threat_level", 0.0)
-            score_color = "green" if score <= 0.3 else "orange" if score <= 0.6 else "red"
-            score_label = QLabel(f"Threat Score: <span style='color:{score_color};'>{score:.2f}</span>")
-            self.scan_results_layout.addWidget(score_label)
-
-            if score >= 0.6:
-                alert_msg = f"⚠️ The file '{file_name}' is MALICIOUS!\nThreat Score: {score:.2f}"
-                QMessageBox.critical(self, "Malicious File Detected", alert_msg)
-                malicious_label = QLabel("<b><span style='color:red;'>This file is malicious.</span></b>")
-                self.scan_results_layout.addWidget(malicious_label)
-
-            threats = report.get("threat_analysis", {}).get("threats", [])
-            if threats:
-                self.scan_results_layout.addWidget(QLabel("<b>Detected Threats:</b>"))
-                for t in threats:
-                    sig = t.get("signature_name", t.get("type", "Unknown"))
-                    lvl = t.get("threat_level", "Unknown")
-                    desc = t.get("details", "")
-                    self.scan_results_layout.addWidget(QLabel(f"- {sig} ({lvl}): {desc}"))
-
-            separator = QLabel("")
-            separator.setStyleSheet("min-height: 1px; background-color: #ccc;")
-            self.scan_results_layout.addWidget(separator)
-
-            # ✅ SHOW ANALYSIS REPORT PANEL
-            report_panel = ReportPanel()
-            report_panel.display_report(report)
-            self.report_layout.addWidget(report_panel)
-
-            # REMOVED: Monitoring Panel logic
-
-            # ✅ PRINT THE WHOLE REPORT
-            print(f"[Complete Report for {file_name}]:")
-            import json
-            print(json.dumps(report, indent=2))
-
-        self.scan_results_layout.addStretch()
+        self.results_browser.clear()
+        self.report_browser.clear()
+
+    def display_result(self, file_path, report):
+        """Append a single file's result to both tabs as soon as it is available"""
+        file_name = os.path.basename(file_path)
+        self.results_browser.append(self._result_html(file_name, report))
+        self.report_browser.append(self._report_html(report))
+        self._report_scanned(file_name, report)
+
+    def _report_scanned(self, file_name, report):
+        score = report.get("threat_level", 0.0)
+        if score >= 0.6:
+            alert_msg = f"⚠️ The file '{file_name}' is MALICIOUS!\nThreat Score: {score:.2f}"
+            QMessageBox.critical(self, "Malicious File Detected", alert_msg)
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Complete report for %s: %r", file_name, report)
+
+    @staticmethod
+    def _result_html(file_name, report):
+        parts = [
+            f"<p><b>File: {escape(file_name)}</b><br>",
+            f"Status: {escape(str(report.get('status', 'Unknown')))}<br>",
+            f"Execution Time: {report.get('execution_time', 0):.2f} seconds<br>",
+        ]
+
+        score = report.get("threat_level", 0.0)
+        score_color = "green" if score <= 0.3 else "orange" if score <= 0.6 else "red"
+        parts.append(f"Threat Score: <span style='color:{score_color};'>{score:.2f}</span></p>")
+
+        if score >= 0.6:
+            parts.append("<p><b><span style='color:red;'>This file is malicious.</span></b></p>")
+
+        threats = report.get("threat_analysis", {}).get("threats", [])
+        if threats:
+            parts.append("<p><b>Detected Threats:</b></p><ul>")
+            for t in threats:
+                sig = t.get("signature_name", t.get("type", "Unknown"))
+                lvl = t.get("threat_level", "Unknown")
+                desc = t.get("details", "")
+                parts.append(f"<li>{escape(str(sig))} ({escape(str(lvl))}): {escape(str(desc))}</li>")
+            parts.append("</ul>")
+
+        parts.append("<hr>")
+        return "".join(parts)
+
+    @staticmethod
+    def _report_html(report):
+        # Same fields as ReportPanel: name, score, verdict and detected keywords
+        file_name = escape(str(report.get("filename", "Unknown")))
+        threat_score = report.get("threat_level", 0.0)
+        is_malicious = "Yes" if threat_score >= 0.6 else "No"
+
+        parts = [
+            f"<h3>Analysis Report: {file_name}</h3>",
+            "<table cellpadding='2'>",
+            f"<tr><td width='200'>File Name</td><td>{file_name}</td></tr>",
+            f"<tr><td>Threat Score</td><td>{threat_score:.2f}</td></tr>",
+            f"<tr><td>Malicious</td><td>{is_malicious}</td></tr>",
+            "</table>",
+        ]
+
+        keywords = []
+        for t in report.get("threat_analysis", {}).get("threats", []):
+            if "signature_name" in t:
+                keywords.append(t["signature_name"])
+            elif "type" in t:
+                keywords.append(t["type"])
+
+        if keywords:
+            parts.append("<p>Detected Keywords</p><ul>")
+            parts.extend(f"<li>{escape(str(kw))}</li>" for kw in keywords)
+            parts.append("</ul>")
+
+        return "".join(parts)
@@ -1,9 +1,11 @@
-import json
+import logging
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
 )
 from PyQt6.QtGui import QFont
 
+from saferun.utils.logger import LogManager
+
 
 class ReportPanel(QWidget):
     """
@@ -14,6 +16,7 @@ class ReportPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.report_data = {}
+        self.logger = LogManager().get_logger("gui")
         self._init_ui()
 
     def _init_ui(self):
@@ -41,9 +44,20 @@ class ReportPanel(QWidget):
         """
         self.report_data = report_data
 
-        print("[Analysis Report Output]")
-        print(json.dumps(report_data, indent=2))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Analysis report: %r", report_data)
+
+        # Rebuild the tree with updates and sorting suspended, inserting items in bulk
+        sorting_enabled = self.report_tree.isSortingEnabled()
+        self.report_tree.setUpdatesEnabled(False)
+        self.report_tree.setSortingEnabled(False)
+        try:
+            self._build_report_tree(report_data)
+        finally:
+            self.report_tree.setSortingEnabled(sorting_enabled)
+            self.report_tree.setUpdatesEnabled(True)
 
+    def _build_report_tree(self, report_data):
         # Clear previous contents
         self.report_tree.clear()
 
@@ -55,9 +69,11 @@ class ReportPanel(QWidget):
         threat_score = report_data.get("threat_level", 0.0)
         is_malicious = "Yes" if threat_score >= 0.6 else "No"
 
-        self.report_tree.addTopLevelItem(QTreeWidgetItem(["File Name", file_name]))
-        self.report_tree.addTopLevelItem(QTreeWidgetItem(["Threat Score", f"{threat_score:.2f}"]))
-        self.report_tree.addTopLevelItem(QTreeWidgetItem(["Malicious", is_malicious]))
+        items = [
+            QTreeWidgetItem(["File Name", file_name]),
+            QTreeWidgetItem(["Threat Score", f"{threat_score:.2f}"]),
+            QTreeWidgetItem(["Malicious", is_malicious]),
+        ]
 
         # Extract keywords
         keywords = []
@@ -70,6 +86,7 @@ class ReportPanel(QWidget):
 
         if keywords:
             keywords_node = QTreeWidgetItem(["Detected Keywords", ""])
-            for kw in keywords:
-                keywords_node.addChild(QTreeWidgetItem(["Keyword", kw]))
-            self.report_tree.addTopLevelItem(keywords_node)
+            keywords_node.addChildren([QTreeWidgetItem(["Keyword", kw]) for kw in keywords])
+            items.append(keywords_node)
+
+        self.report_tree.addTopLevelItems(items)
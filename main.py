@@ -1,10 +1,10 @@
 import os
 import sys
 import argparse
-import json  # ✅ ADDED
 from pathlib import Path
 from saferun.config import settings
 from saferun.core.sandbox import Sandbox
+from saferun.utils import json_utils
 from saferun.utils.logger import LogManager
 from saferun.core.threat_detector import ThreatLevel  # Required for .name in CLI
 
@@ -19,24 +19,30 @@ def run_sandbox(file_path: str, security_level: str = "medium", isolation_method
     logger = LogManager().get_logger("main")
     logger.info(f"Starting sandbox execution for {file_path}")
     sandbox = Sandbox(isolation_method=isolation_method, security_level=security_level)
-    report = sandbox.execute_file(file_path)
+    try:
+        report = sandbox.execute_file(file_path)
+    finally:
+        sandbox.cleanup()
     logger.info(f"Execution completed with status: {report.get('status', 'unknown')}")
     return report
 
 
 def launch_gui() -> int:
+    # Imported here so CLI runs don't pay for loading Qt
     try:
         from PyQt6.QtWidgets import QApplication
         from saferun.gui.main_window import MainWindow
-
-        app = QApplication(sys.argv)
-        window = MainWindow()
-        window.show()
-        return app.exec()
     except ImportError:
         print("Error: GUI components not found. Make sure PyQt6 is installed and saferun.gui module exists.")
         print("You can install PyQt6 with: pip install PyQt6")
         return 1
+
+    try:
+        # Reuse an existing QApplication; Qt allows only one per process
+        app = QApplication.instance() or QApplication(sys.argv)
+        window = MainWindow()
+        window.show()
+        return app.exec()
     except Exception as e:
         print(f"Unexpected error while launching GUI: {e}")
         return 1
@@ -101,12 +107,12 @@ def main() -> int:
         for section in ["file_operations", "network_activity", "registry_operations"]:
             if section in report:
                 print(f"\n[{section.replace('_', ' ').title()}]")
-                for item in report[section]:
-                    print(json.dumps(item, indent=2))
+                if report[section]:
+                    print("\n".join(json_utils.dumps(item, indent=True) for item in report[section]))
 
         # ✅ ADDED: Print full raw report like Analysis Report tab
         print("\n🧾 Full Report JSON:")
-        print(json.dumps(report, indent=2))
+        print(json_utils.dumps(report, indent=True))
 
         return 0
 
@@ -3,12 +3,59 @@ import sys
 import logging
 import subprocess
 import tempfile
+import secrets
+import atexit
+import shlex
 import shutil
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from saferun.utils.system_utils import communicate_capped, docker_ping
 
 # Check if we're running on Linux
 if not sys.platform.startswith('linux'):
     raise ImportError("This module should only be imported on Linux systems")
 
+# Supported container runtimes, in order of preference
+_CONTAINER_RUNTIMES = ("docker", "podman")
+
+
+def _probe_runtime(cmd, arg, timeout):
+    """Return True if `cmd arg` runs and exits cleanly"""
+    try:
+        result = subprocess.run([cmd, arg], capture_output=True, timeout=timeout)
+        return result.returncode == 0
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return False
+
+
+def _find_container_runtime(arg, timeout):
+    """Probe all runtimes concurrently and return the preferred one that responds"""
+    executor = ThreadPoolExecutor(max_workers=len(_CONTAINER_RUNTIMES))
+    try:
+        futures = [executor.submit(_probe_runtime, cmd, arg, timeout) for cmd in _CONTAINER_RUNTIMES]
+        for cmd, future in zip(_CONTAINER_RUNTIMES, futures):
+            if future.result():
+                return cmd
+        return None
+    finally:
+        # Don't wait on slower probes once a preferred runtime has answered
+        executor.shutdown(wait=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _work_dir():
+    """Per-process parent directory for basic-isolation runs, removed at exit"""
+    path = tempfile.mkdtemp(prefix="saferun_basic_")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+@functools.lru_cache(maxsize=1)
+def _container_command():
+    """Installed container runtime, probed once per process"""
+    return _find_container_runtime("--version", timeout=2)
+
 
 class LinuxContainerHandler:
     """Handles container operations for Linux systems"""
@@ -19,17 +66,17 @@ class LinuxContainerHandler:
     @staticmethod
     def check_container_support():
         """Check if Docker or similar container tech is available"""
-        for cmd in ["docker", "podman"]:
-            try:
-                result = subprocess.run([cmd, "version"], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    return True
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-        return False
+        # A daemon answering on its socket settles it without forking the CLI
+        if shutil.which("docker") and docker_ping():
+            return True
+        return _find_container_runtime("version", timeout=5) is not None
 
-    def create_container(self, security_level, memory_limit, cpu_limit, network_access):
-        """Create a Linux container for isolation"""
+    def create_container(self, security_level, memory_limit, cpu_limit, network_access, host_mount=None):
+        """Create a Linux container for isolation
+
+        If host_mount is given, that host directory is mounted read-only at
+        /sandbox so files staged there need no copy_to_container.
+        """
         try:
             container_cmd = self._get_container_command()
             if not container_cmd:
@@ -49,6 +96,9 @@ class LinuxContainerHandler:
             elif security_level == "medium":
                 cmd.extend(["--cap-drop=NET_ADMIN", "--cap-drop=SYS_ADMIN"])
 
+            if host_mount:
+                cmd.extend(["-v", f"{host_mount}:/sandbox:ro"])
+
             cmd.append("alpine:latest")
             cmd.extend(["tail", "-f", "/dev/null"])
 
@@ -63,33 +113,67 @@ class LinuxContainerHandler:
         """Copy a file to the container"""
         try:
             container_cmd = self._get_container_command()
-            filename = os.path.basename(file_path)
-            container_path = f"/sandbox/{filename}"
+            if not container_cmd:
+                raise RuntimeError("No container runtime found")
+            container_path = self.sandbox_path(file_path)
 
-            subprocess.run([container_cmd, "exec", container_id, "mkdir", "-p", "/sandbox"], capture_output=True,
-                           check=True)
-            subprocess.run([container_cmd, "cp", file_path, f"{container_id}:/sandbox/"], capture_output=True,
-                           check=True)
-            subprocess.run([container_cmd, "exec", container_id, "chmod", "+x", container_path], capture_output=True,
-                           check=True)
+            # One exec: create the directory, stream the file in over stdin and mark it executable
+            quoted_path = shlex.quote(container_path)
+            with open(file_path, 'rb') as src:
+                subprocess.run([container_cmd, "exec", "-i", container_id, "sh", "-c",
+                                f"mkdir -p /sandbox && cat > {quoted_path} && chmod +x {quoted_path}"],
+                               stdin=src, capture_output=True, check=True)
 
             return container_path
 
-        except subprocess.SubprocessError as e:
+        except (subprocess.SubprocessError, OSError) as e:
             self.logger.error(f"Failed to copy file to container: {str(e)}")
             raise RuntimeError("File transfer to container failed")
 
+    def remove_container(self, container_id):
+        """Stop and remove a container"""
+        try:
+            container_cmd = self._get_container_command()
+            if not container_cmd:
+                raise RuntimeError("No container runtime found")
+            subprocess.run([container_cmd, "rm", "-f", container_id], capture_output=True, check=True)
+            return True
+        except subprocess.SubprocessError as e:
+            self.logger.error(f"Failed to remove container: {str(e)}")
+            return False
+
+    def reset_container(self, container_id):
+        """Return a container to a clean state so it can be reused
+
+        Kills every process except the keep-alive (PID 1) and deletes /tmp and,
+        unless it is a read-only host mount, /sandbox. Returns False if that
+        could not be done.
+        """
+        try:
+            container_cmd = self._get_container_command()
+            if not container_cmd:
+                raise RuntimeError("No container runtime found")
+            # kill -1 signals everything but PID 1 and the shell itself; it fails
+            # harmlessly when nothing else is running
+            subprocess.run([container_cmd, "exec", container_id, "sh", "-c",
+                            "kill -KILL -1 2>/dev/null; "
+                            "rm -rf /tmp/* /tmp/.[!.]* /tmp/..?* && "
+                            "{ [ ! -w /sandbox ] || rm -rf /sandbox; }"],
+                           capture_output=True, check=True, timeout=10)
+            return True
+        except (subprocess.SubprocessError, RuntimeError) as e:
+            self.logger.error(f"Failed to reset container: {str(e)}")
+            return False
+
+    @staticmethod
+    def sandbox_path(file_path):
+        """Path a host file has inside the container's /sandbox directory"""
+        return f"/sandbox/{os.path.basename(file_path)}"
+
     @staticmethod
     def _get_container_command():
         """Determine which container runtime to use"""
-        for cmd in ["docker", "podman"]:
-            try:
-                result = subprocess.run([cmd, "--version"], capture_output=True, timeout=2)
-                if result.returncode == 0:
-                    return cmd
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-        return None
+        return _container_command()
 
 
 class LinuxProcessHandler:
@@ -125,16 +209,28 @@ class LinuxProcessHandler:
     @staticmethod
     def _execute_basic_isolation(file_path, args):
         """Execute with basic isolation when no sandboxing tools are available"""
-        temp_dir = tempfile.mkdtemp(prefix="saferun_basic_")
+        if hasattr(os, "memfd_create"):
+            try:
+                return LinuxProcessHandler._execute_from_memfd(file_path, args)
+            except OSError:
+                # e.g. executing memfds is disabled (vm.memfd_noexec); stage on disk instead
+                pass
+
+        temp_dir = os.path.join(_work_dir(), secrets.token_hex(8))
+        os.mkdir(temp_dir, 0o700)
         try:
             target_file = os.path.basename(file_path)
             target_path = os.path.join(temp_dir, target_file)
-            shutil.copy2(file_path, target_path)
+            # copyfile uses the kernel's in-place copy (sendfile/copy_file_range) on Linux;
+            # metadata isn't needed since the mode is set right after
+            shutil.copyfile(file_path, target_path)
             os.chmod(target_path, 0o755)
 
             cmd = [target_path] + args
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            stdout, stderr = process.communicate(timeout=30)
+            # Own process group, so a timeout also kills anything the file spawned
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       start_new_session=True)
+            stdout, stderr = communicate_capped(process, timeout=30)
 
             return {
                 "stdout": stdout,
@@ -148,6 +244,30 @@ class LinuxProcessHandler:
         finally:
             shutil.rmtree(temp_dir, ignore_errors=True)
 
+    @staticmethod
+    def _execute_from_memfd(file_path, args):
+        """Execute an anonymous in-memory copy of the file, with nothing staged on disk"""
+        fd = os.memfd_create("saferun")
+        try:
+            with open(file_path, "rb") as src, os.fdopen(fd, "wb", closefd=False) as dst:
+                shutil.copyfileobj(src, dst)
+            # The child inherits the fd, so /proc/self/fd/N resolves there too
+            process = subprocess.Popen([f"/proc/self/fd/{fd}"] + args, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, pass_fds=(fd,), start_new_session=True)
+        finally:
+            os.close(fd)
+
+        try:
+            stdout, stderr = communicate_capped(process, timeout=30)
+        except subprocess.SubprocessError as e:
+            return {"stdout": "", "stderr": str(e), "exit_code": -1}
+
+        return {
+            "stdout": stdout,
+            "stderr": stderr,
+            "exit_code": process.returncode
+        }
+
     @staticmethod
     def terminate_process(process):
         """Terminate an isolated process"""
@@ -4,35 +4,74 @@ Handles system-specific tasks for isolation, monitoring, and security on macOS s
 """
 
 import os
+import re
+import time
+import shlex
+import shutil
+import atexit
+import threading
 import subprocess
 import psutil
 import logging
 from saferun.core.isolation import IsolationProvider
+from saferun.utils.system_utils import docker_ping, run_capped
 
 logger = logging.getLogger(__name__)
 
+# Columns read from `docker stats`, one container per line
+_STATS_FORMAT = '{{.ID}}\t{{.CPUPerc}}\t{{.MemUsage}}\t{{.MemPerc}}\t{{.BlockIO}}\t{{.NetIO}}'
+# docker stats redraws with terminal escapes even when piped
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
 
 class MacOSPlatform(IsolationProvider):
     """MacOS implementation of the platform-specific isolation provider."""
 
+    # How long a check_prerequisites() result is reused, in seconds
+    PREREQ_CACHE_TTL = 60
+    _prereq_result = None
+    _prereq_checked_at = 0.0
+
     def __init__(self):
         """Initialize the MacOS platform handler."""
         super().__init__()
         self.platform_name = "macos"
+        # Streaming `docker stats` process and its latest sample per short container ID
+        self._stats_proc = None
+        self._stats_atexit_registered = False
+        self._latest_stats = {}
         logger.info("Initializing MacOS platform handler")
 
-    @staticmethod
-    def check_prerequisites():
+    @classmethod
+    def check_prerequisites(cls):
         """
         Check if all required prerequisites for MacOS sandboxing are available.
 
+        The result is cached for PREREQ_CACHE_TTL seconds.
+
         Returns:
             bool: True if all prerequisites are met, False otherwise
         """
+        now = time.monotonic()
+        if cls._prereq_result is not None and now - cls._prereq_checked_at < cls.PREREQ_CACHE_TTL:
+            return cls._prereq_result
+
+        cls._prereq_result = cls._check_prerequisites_uncached()
+        cls._prereq_checked_at = now
+        return cls._prereq_result
+
+    @staticmethod
+    def _check_prerequisites_uncached():
         # Check if Docker is installed and running
         try:
-            docker_info = subprocess.run(['docker', 'info'], capture_output=True, text=True)
-            if docker_info.returncode != 0:
+            if shutil.which('docker') is None:
+                raise FileNotFoundError("docker")
+
+            # Ping the daemon's socket directly; only ask the CLI when no socket is found
+            running = docker_ping()
+            if running is None:
+                running = subprocess.run(['docker', 'info'], capture_output=True, text=True).returncode == 0
+            if not running:
                 logger.error("Docker is not running. Please start Docker Desktop.")
                 return False
 
@@ -87,7 +126,7 @@ class MacOSPlatform(IsolationProvider):
             logger.warning("Native macOS sandboxing has limited capabilities")
             return f"native_sandbox_{os.getpid()}"
 
-    def run_in_sandbox(self, sandbox_id, command, timeout=30):
+    def run_in_sandbox(self, sandbox_id, command, timeout=30, shell=False):
         """
         Execute a command inside the sandbox.
 
@@ -95,6 +134,7 @@ class MacOSPlatform(IsolationProvider):
             sandbox_id (str): ID of the sandbox to use
             command (list): Command to execute as a list of strings
             timeout (int): Maximum execution time in seconds
+            shell (bool): Run the command through `sh -c` in a Docker sandbox
 
         Returns:
             tuple: (stdout, stderr, return_code)
@@ -105,12 +145,7 @@ class MacOSPlatform(IsolationProvider):
             sandboxed_cmd.extend(command)
 
             try:
-                result = subprocess.run(
-                    sandboxed_cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout
-                )
+                result = run_capped(sandboxed_cmd, timeout=timeout)
                 return result.stdout, result.stderr, result.returncode
             except subprocess.TimeoutExpired:
                 logger.warning(f"Command timed out after {timeout} seconds")
@@ -120,17 +155,14 @@ class MacOSPlatform(IsolationProvider):
                 return "", str(e), -1
         else:
             # For Docker sandbox
-            docker_cmd = [
-                'docker', 'exec', sandbox_id, 'sh', '-c', ' '.join(command)
-            ]
+            # Pass argv straight through unless shell features are asked for
+            if shell:
+                docker_cmd = ['docker', 'exec', sandbox_id, 'sh', '-c', shlex.join(command)]
+            else:
+                docker_cmd = ['docker', 'exec', sandbox_id] + list(command)
 
             try:
-                result = subprocess.run(
-                    docker_cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout
-                )
+                result = run_capped(docker_cmd, timeout=timeout)
                 return result.stdout, result.stderr, result.returncode
             except subprocess.TimeoutExpired:
                 logger.warning(f"Docker command timed out after {timeout} seconds")
@@ -168,11 +200,42 @@ class MacOSPlatform(IsolationProvider):
                 logger.error(f"Failed to destroy Docker sandbox {sandbox_id}: {e}")
                 return False
 
-    @staticmethod
-    def monitor_resource_usage(sandbox_id):
+    def _ensure_stats_stream(self):
+        """Start (or restart) the background `docker stats` stream"""
+        if self._stats_proc is not None and self._stats_proc.poll() is None:
+            return
+        try:
+            self._stats_proc = subprocess.Popen(['docker', 'stats', '--format', _STATS_FORMAT],
+                                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError as e:
+            logger.warning(f"Could not start docker stats stream: {e}")
+            self._stats_proc = None
+            return
+        if not self._stats_atexit_registered:
+            self._stats_atexit_registered = True
+            atexit.register(self.stop_stats_stream)
+        threading.Thread(target=self._read_stats_stream, args=(self._stats_proc,), daemon=True).start()
+
+    def _read_stats_stream(self, proc):
+        for line in proc.stdout:
+            fields = _ANSI_ESCAPE.sub("", line).strip().split('\t')
+            if len(fields) >= 6:
+                self._latest_stats[fields[0]] = fields[1:]
+
+    def stop_stats_stream(self):
+        """Stop the background `docker stats` stream, if running"""
+        proc, self._stats_proc = self._stats_proc, None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def monitor_resource_usage(self, sandbox_id):
         """
         Get current resource usage for the sandbox.
 
+        Docker sandboxes are read from a single streaming `docker stats`
+        process; a one-shot poll is used only until it has reported the
+        container.
+
         Args:
             sandbox_id (str): ID of the sandbox to monitor
 
@@ -200,19 +263,18 @@ class MacOSPlatform(IsolationProvider):
         else:
             # For Docker sandbox
             try:
-                stats_cmd = ['docker', 'stats', '--no-stream', '--format',
-                             '{{.CPUPerc}}\t{{.MemUsage}}\t{{.MemPerc}}\t{{.BlockIO}}\t{{.NetIO}}',
-                             sandbox_id]
-
-                result = subprocess.run(stats_cmd, capture_output=True, text=True, check=True)
-
-                if result.stdout.strip():
-                    stats = result.stdout.strip().split('\t')
-                    if len(stats) >= 5:
-                        metrics['cpu_percent'] = float(stats[0].replace('%', ''))
-                        metrics['memory_percent'] = float(stats[2].replace('%', ''))
-                        metrics['disk_io'] = stats[3]
-                        metrics['network_io'] = stats[4]
+                self._ensure_stats_stream()
+                stats = self._latest_stats.get(sandbox_id[:12])
+                if stats is None:
+                    stats_cmd = ['docker', 'stats', '--no-stream', '--format', _STATS_FORMAT, sandbox_id]
+                    result = subprocess.run(stats_cmd, capture_output=True, text=True, check=True)
+                    stats = result.stdout.strip().split('\t')[1:]
+
+                if len(stats) >= 5:
+                    metrics['cpu_percent'] = float(stats[0].replace('%', ''))
+                    metrics['memory_percent'] = float(stats[2].replace('%', ''))
+                    metrics['disk_io'] = stats[3]
+                    metrics['network_io'] = stats[4]
             except subprocess.CalledProcessError as e:
                 logger.exception(f"Error monitoring Docker sandbox {sandbox_id}: {e}")
 
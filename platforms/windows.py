@@ -4,7 +4,8 @@ import sys
 import logging
 import subprocess
 import tempfile
-from ctypes import windll
+
+from saferun.utils.system_utils import communicate_capped, is_admin, run_capped
 
 if not sys.platform.startswith('win'):
     raise ImportError("This module should only be imported on Windows systems")
@@ -22,7 +23,8 @@ class WindowsContainerHandler:
         except (subprocess.SubprocessError, FileNotFoundError):
             return False
 
-    def create_container(self, security_level, memory_limit, cpu_limit, network_access, security_opts=None):
+    def create_container(self, security_level, memory_limit, cpu_limit, network_access, security_opts=None,
+                         host_mount=None):
         try:
             cmd = [
                 "docker", "run", "-d",
@@ -31,6 +33,8 @@ class WindowsContainerHandler:
             ]
             if not network_access or security_level == "high":
                 cmd.append("--network=none")
+            if host_mount:
+                cmd += ["-v", f"{host_mount}:C:\\sandbox:ro"]
 
             cmd += ["mcr.microsoft.com/windows/servercore:ltsc2019", "ping", "-t", "localhost"]
 
@@ -42,8 +46,7 @@ class WindowsContainerHandler:
 
     def copy_to_container(self, container_id, file_path):
         try:
-            filename = os.path.basename(file_path)
-            container_path = f"C:\\sandbox\\{filename}"
+            container_path = self.sandbox_path(file_path)
 
             subprocess.run(["docker", "exec", container_id, "mkdir", "C:\\sandbox"], capture_output=True, check=False)
             subprocess.run(["docker", "cp", file_path, f"{container_id}:C:\\sandbox"], capture_output=True, check=True)
@@ -53,10 +56,14 @@ class WindowsContainerHandler:
             self.logger.error(f"Failed to copy file to container: {str(e)}")
             raise RuntimeError("File transfer to container failed")
 
+    @staticmethod
+    def sandbox_path(file_path):
+        return f"C:\\sandbox\\{os.path.basename(file_path)}"
+
     def execute_in_container(self, container_id, container_path, args):
         try:
             cmd = ["docker", "exec", container_id, container_path] + args
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = run_capped(cmd, timeout=30)
             return {
                 "stdout": result.stdout,
                 "stderr": result.stderr,
@@ -67,6 +74,11 @@ class WindowsContainerHandler:
         except subprocess.SubprocessError as e:
             return {"stdout": "", "stderr": str(e), "exit_code": -1}
 
+    def reset_container(self, container_id):
+        # There is no reliable way to kill a sample's leftover processes without
+        # also killing the container's system services, so never reuse one
+        return False
+
     def remove_container(self, container_id):
         try:
             subprocess.run(["docker", "stop", container_id], capture_output=True, check=False)
@@ -87,7 +99,7 @@ class WindowsProcessHandler:
 
     def initialize(self, security_level, memory_limit=None, cpu_limit=None, network_access=None, io_priority=None, temp_dir=None):
         try:
-            if not windll.shell32.IsUserAnAdmin():
+            if not is_admin():
                 self.logger.warning("Process isolation works best with administrator privileges")
             return True
         except Exception as e:
@@ -95,28 +107,28 @@ class WindowsProcessHandler:
             return False
 
     def execute_isolated(self, file_path, args, security_level, working_dir=None):
+        batch_path = None
         try:
-            with tempfile.NamedTemporaryFile(suffix='.bat', delete=False, mode='w') as f:
-                batch_path = f.name
-                f.write(f'@echo off\n"{file_path}" {" ".join(args)}\n')
-
             if self._is_windows_sandbox_available() and security_level != "low":
+                # Only the Windows Sandbox path needs the launcher batch file
+                with tempfile.NamedTemporaryFile(suffix='.bat', delete=False, mode='w') as f:
+                    batch_path = f.name
+                    f.write(f'@echo off\n"{file_path}" {" ".join(args)}\n')
                 return self._execute_in_windows_sandbox(batch_path)
 
             process = subprocess.Popen(
                 [file_path] + args,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
                 cwd=working_dir,
                 creationflags=subprocess.CREATE_NEW_PROCESS_GROUP
             )
 
             try:
-                stdout, stderr = process.communicate(timeout=30)
-            except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
+                stdout, stderr = communicate_capped(process, timeout=30)
+            except subprocess.TimeoutExpired as e:
+                # communicate_capped has already killed the process
+                stdout, stderr = e.stdout, e.stderr
 
             return process, {
                 "stdout": stdout,
@@ -127,7 +139,7 @@ class WindowsProcessHandler:
             self.logger.error(f"Error during isolated execution: {str(e)}")
             return None, {"stdout": "", "stderr": str(e), "exit_code": -1}
         finally:
-            if os.path.exists(batch_path):
+            if batch_path and os.path.exists(batch_path):
                 os.unlink(batch_path)
 
     @staticmethod
@@ -19,6 +19,7 @@ setup(
         "docker==7.0.0",
         "psutil==5.9.8",
         "pyyaml==6.0.1",
+        "pyahocorasick==2.1.0",
         "requests==2.32.0",
         "pandas==2.2.2",
         "numpy>=1.26.0,<2.1.0",
@@ -51,6 +52,9 @@ setup(
     extras_require={
         "dev": [
             "pytest==8.1.1"
+        ],
+        "speedups": [
+            "orjson==3.10.7"
         ]
     }
 )
@@ -1,9 +1,181 @@
 import os
+import mmap
+import json
+import time
+import sqlite3
 import hashlib
 import re
+import threading
+import ahocorasick
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
 from saferun.config import settings
+from saferun.utils import json_utils
 from saferun.utils.logger import LogManager
 
+# hashlib releases the GIL while digesting large buffers, so big chunks let
+# concurrent scan threads hash in parallel instead of queueing on the GIL
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Helper threads for work that overlaps a file's hashing: the SHA-256 half of
+# the digest and the script pattern scan. Threads start on first use.
+_ANALYSIS_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="file-analyzer")
+
+# Scripts at least this large are scanned through mmap rather than read()
+_MMAP_THRESHOLD = 64 * 1024
+# Window size for the anchor scan
+_SCAN_CHUNK = 1024 * 1024
+
+# Suspicious script patterns, matched against the raw bytes and reported in this order
+_SUSPICIOUS_PATTERNS = {
+    "Obfuscation": rb"eval\(|exec\(|base64\.decode|fromCharCode",
+    "System Access": rb"subprocess\.call|os\.system|exec\s+|runtime\.exec",
+    "Privilege Escalation": rb"sudo|runas|powershell -command",
+    "Network Connection": rb"socket\.connect|http[s]?://|urllib|requests\.get|curl |wget ",
+    "Data Exfiltration": rb"\.upload\(|POST http|ftp\.put|send\(|mail\(",
+    "Registry Access": rb"HKEY_|Registry\.|Reg(Create|Set)Key",
+    "Browser Exploit": rb"navigator\.userAgent|document\.cookie|localStorage|sessionStorage"
+}
+# Everything below (anchors, scan, confirmation, result order) is driven by this dict
+_COMPILED_PATTERNS = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in _SUSPICIOUS_PATTERNS.items()}
+
+# Shortest literal accepted as an anchor; shorter ones would hit almost every file
+_MIN_ANCHOR_LENGTH = 3
+
+
+def _split_alternatives(pattern):
+    """Split a bytes regex on its top-level | (not inside groups, classes or escapes)"""
+    alternatives = []
+    start = depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i:i + 1]
+        if char == b"\\":
+            i += 1
+        elif in_class:
+            in_class = char != b"]"
+        elif char == b"[":
+            in_class = True
+        elif char == b"(":
+            depth += 1
+        elif char == b")":
+            depth -= 1
+        elif char == b"|" and depth == 0:
+            alternatives.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    alternatives.append(pattern[start:])
+    return alternatives
+
+
+def _alternative_anchor(alternative):
+    """Return (literal, exact) for one alternative: its longest run of literal
+    characters, lowercased, and whether that run is the whole alternative"""
+    runs = [[]]
+    exact = True
+    for op, value in sre_parse.parse(alternative):
+        if op is sre_parse.LITERAL:
+            runs[-1].append(value)
+        else:
+            exact = False
+            runs.append([])
+    literal = max(runs, key=len)
+    return bytes(literal).lower().decode("latin1"), exact
+
+
+def _derive_pattern_anchors():
+    """Lowercase literals that every match of each pattern must contain.
+
+    Every top-level alternative of a pattern contributes one anchor. An anchor
+    marked exact is a whole alternative, so finding it settles the match; the
+    others only make the regex worth running. An alternative with no usable
+    literal fails the import rather than silently never matching.
+    """
+    anchors = {}
+    for name, compiled in _COMPILED_PATTERNS.items():
+        anchors[name] = []
+        for alternative in _split_alternatives(compiled.pattern):
+            literal, exact = _alternative_anchor(alternative)
+            if len(literal) < _MIN_ANCHOR_LENGTH:
+                raise RuntimeError(f"Pattern {name!r} alternative {alternative!r} has no literal of at least "
+                                   f"{_MIN_ANCHOR_LENGTH} characters to anchor on")
+            anchors[name].append((literal, exact))
+    return anchors
+
+
+_PATTERN_ANCHORS = _derive_pattern_anchors()
+
+
+def _build_anchor_automaton():
+    automaton = ahocorasick.Automaton()
+    for name, anchors in _PATTERN_ANCHORS.items():
+        for literal, exact in anchors:
+            if literal in automaton:
+                automaton.get(literal).append((name, exact))
+            else:
+                automaton.add_word(literal, [(name, exact)])
+    automaton.make_automaton()
+    return automaton
+
+
+_ANCHOR_AUTOMATON = _build_anchor_automaton()
+# Windows overlap so an anchor spanning a window boundary is still seen
+_ANCHOR_OVERLAP = max(len(literal) for anchors in _PATTERN_ANCHORS.values() for literal, _ in anchors) - 1
+
+# Results of files that had to be read, reused while path, size and mtime match.
+# SQLite rather than shelve: scan worker processes share the file.
+_ANALYSIS_CACHE_FILE = os.path.join(settings.CACHE_DIR, "analysis.db")
+_ANALYSIS_CACHE_TTL = 24 * 60 * 60
+# Bump when the analysis changes so older cached results are ignored
+_ANALYSIS_CACHE_VERSION = 2
+# A cache hit is re-checked against a digest of the file's first bytes
+_CACHE_VERIFY_BYTES = 64 * 1024
+
+
+def _head_digest(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read(_CACHE_VERIFY_BYTES)).hexdigest()
+
+
+# One connection per thread (sqlite3 connections are bound to their thread);
+# the schema is created the first time any thread in this process connects
+_analysis_cache_local = threading.local()
+_analysis_cache_lock = threading.Lock()
+_analysis_cache_ready = False
+
+
+def _analysis_cache():
+    global _analysis_cache_ready
+    conn = getattr(_analysis_cache_local, "conn", None)
+    if conn is not None:
+        return conn
+    with _analysis_cache_lock:
+        if not _analysis_cache_ready:
+            os.makedirs(os.path.dirname(_ANALYSIS_CACHE_FILE), exist_ok=True)
+        conn = sqlite3.connect(_ANALYSIS_CACHE_FILE, timeout=5)
+        if not _analysis_cache_ready:
+            try:
+                conn.execute("CREATE TABLE IF NOT EXISTS analysis "
+                             "(key TEXT PRIMARY KEY, head_sha256 TEXT, result TEXT, created REAL)")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            _analysis_cache_ready = True
+    _analysis_cache_local.conn = conn
+    return conn
+
+
+def _drop_analysis_cache():
+    # Reconnect on next use rather than keep a connection that just failed
+    conn = getattr(_analysis_cache_local, "conn", None)
+    _analysis_cache_local.conn = None
+    if conn is not None:
+        conn.close()
+
 
 class FileAnalyzer:
     def __init__(self):
@@ -15,18 +187,49 @@ class FileAnalyzer:
             return {"error": "File not found", "threat_level": 0.0}
 
         try:
-            file_size = os.path.getsize(file_path)
+            st = os.stat(file_path)
+            file_size = st.st_size
             file_name = os.path.basename(file_path)
             file_ext = os.path.splitext(file_name)[1].lower()
 
-            md5_hash = self._calculate_hash(file_path, "md5")
-            sha256_hash = self._calculate_hash(file_path, "sha256")
+            is_executable = self._is_executable(file_path, file_ext)
+            is_script = file_ext in [".sh", ".py", ".bat", ".ps1"]
+            if not is_executable and not is_script:
+                # Nothing here can raise the score, so skip reading the file at all
+                self.logger.info(f"File analysis completed for {file_name}, threat level: 0.0 (not code)")
+                return {
+                    "filename": file_name,
+                    "file_size": file_size,
+                    "file_extension": file_ext,
+                    "file_type": f"Unknown (extension: {file_ext})",
+                    "file_hash": None,
+                    "md5_hash": None,
+                    "is_executable": False,
+                    "threat_level": 0.0,
+                    "threat_analysis": {
+                        "threats": []
+                    }
+                }
+
+            # st_mode is part of the key because chmod +x changes is_executable but not the mtime
+            cache_key = (f"{_ANALYSIS_CACHE_VERSION}:{file_size}:{st.st_mtime_ns}:{st.st_mode}:"
+                         f"{os.path.abspath(file_path)}")
+            cached = self._load_cached(cache_key, file_path)
+            if cached is not None:
+                self.logger.info(f"File analysis loaded from cache for {file_name}, "
+                                 f"threat level: {cached.get('threat_level')}")
+                return cached
+
+            # The pattern scan mostly holds the GIL while hashing releases it, so run them side by side
+            pattern_future = (_ANALYSIS_POOL.submit(self._check_script_for_suspicious_patterns, file_path)
+                              if is_script else None)
+
+            md5_hash, sha256_hash = self._calculate_hashes(file_path)
 
             file_type = f"Unknown (extension: {file_ext})"
             threat_score = 0.0
             threats = []
 
-            is_executable = self._is_executable(file_path, file_ext)
             if is_executable:
                 threat_score += 0.3
                 threats.append({
@@ -35,7 +238,7 @@ class FileAnalyzer:
                     "details": "The file is an executable, which could perform system-level operations."
                 })
 
-            if file_ext in [".sh", ".py", ".bat", ".ps1"]:
+            if is_script:
                 threat_score += 0.1
                 threats.append({
                     "signature_name": "Script file detected",
@@ -43,7 +246,7 @@ class FileAnalyzer:
                     "details": "Script files may contain commands that alter system behavior."
                 })
 
-                suspicious_patterns = self._check_script_for_suspicious_patterns(file_path)
+                suspicious_patterns = pattern_future.result()
                 for pattern in suspicious_patterns:
                     threat_score += 0.1
                     threats.append({
@@ -68,6 +271,7 @@ class FileAnalyzer:
                 }
             }
 
+            self._store_cached(cache_key, file_path, analysis_result)
             self.logger.info(f"File analysis completed for {file_name}, threat level: {threat_score}")
             return analysis_result
 
@@ -80,12 +284,72 @@ class FileAnalyzer:
                 "threat_analysis": {"threats": []}
             }
 
-    def _calculate_hash(self, file_path, algorithm="sha256"):
-        hash_obj = hashlib.md5() if algorithm == "md5" else hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_obj.update(chunk)
-        return hash_obj.hexdigest()
+    def _load_cached(self, key, file_path):
+        """Return the cached result for key, or None on a miss or any cache error"""
+        try:
+            row = _analysis_cache().execute("SELECT head_sha256, result, created FROM analysis WHERE key = ?",
+                                            (key,)).fetchone()
+            if row is None or time.time() - row[2] > _ANALYSIS_CACHE_TTL:
+                return None
+            if row[0] != _head_digest(file_path):
+                return None
+            return json.loads(row[1])
+        except sqlite3.Error as e:
+            _drop_analysis_cache()
+            self.logger.debug(f"Analysis cache lookup failed: {e}")
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"Analysis cache lookup failed: {e}")
+            return None
+
+    def _store_cached(self, key, file_path, result):
+        try:
+            head_sha256 = _head_digest(file_path)
+            now = time.time()
+            conn = _analysis_cache()
+            with conn:
+                conn.execute("DELETE FROM analysis WHERE created < ?", (now - _ANALYSIS_CACHE_TTL,))
+                conn.execute("INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?)",
+                             (key, head_sha256, json_utils.dumps(result), now))
+        except sqlite3.Error as e:
+            _drop_analysis_cache()
+            self.logger.debug(f"Analysis cache store failed: {e}")
+        except OSError as e:
+            self.logger.debug(f"Analysis cache store failed: {e}")
+
+    def _calculate_hashes(self, file_path):
+        """Compute (md5, sha256) hex digests in a single read of the file
+
+        For files larger than one chunk, SHA-256 is fed from a helper thread
+        while MD5 runs here. The two buffers alternate, so a chunk is never
+        overwritten while the helper is still digesting it.
+        """
+        md5_obj = hashlib.md5()
+        sha256_obj = hashlib.sha256()
+        # Read into reusable buffers instead of allocating a bytes object per chunk
+        buffers = [bytearray(_HASH_CHUNK_SIZE), bytearray(_HASH_CHUNK_SIZE)]
+        views = [memoryview(buf) for buf in buffers]
+        with open(file_path, "rb", buffering=0) as f:
+            threaded = os.fstat(f.fileno()).st_size > _HASH_CHUNK_SIZE
+            pending = None
+            current = 0
+            while True:
+                n = f.readinto(buffers[current])
+                if not n:
+                    break
+                chunk = views[current][:n]
+                if threaded:
+                    # Updates must stay in order; waiting here also frees the other buffer
+                    if pending is not None:
+                        pending.result()
+                    pending = _ANALYSIS_POOL.submit(sha256_obj.update, chunk)
+                else:
+                    sha256_obj.update(chunk)
+                md5_obj.update(chunk)
+                current ^= 1
+            if pending is not None:
+                pending.result()
+        return md5_obj.hexdigest(), sha256_obj.hexdigest()
 
     def _is_executable(self, file_path, file_ext):
         platform_name = settings.PLATFORM
@@ -98,23 +362,41 @@ class FileAnalyzer:
     def _check_script_for_suspicious_patterns(self, file_path):
         suspicious_found = []
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-
-            patterns = {
-                "Obfuscation": r"eval\(|exec\(|base64\.decode|fromCharCode",
-                "System Access": r"subprocess\.call|os\.system|exec\s+|runtime\.exec",
-                "Privilege Escalation": r"sudo|runas|powershell -command",
-                "Network Connection": r"socket\.connect|http[s]?://|urllib|requests\.get|curl |wget ",
-                "Data Exfiltration": r"\.upload\(|POST http|ftp\.put|send\(|mail\(",
-                "Registry Access": r"HKEY_|Registry\.|Reg(Create|Set)Key",
-                "Browser Exploit": r"navigator\.userAgent|document\.cookie|localStorage|sessionStorage"
-            }
+            with open(file_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                        names = self._match_suspicious_patterns(content)
+                else:
+                    names = self._match_suspicious_patterns(f.read())
 
-            for name, pattern in patterns.items():
-                if re.search(pattern, content, re.IGNORECASE):
-                    suspicious_found.append(f"Suspicious {name} pattern")
+            for name in names:
+                suspicious_found.append(f"Suspicious {name} pattern")
         except Exception:
             pass
 
         return suspicious_found
+
+    @staticmethod
+    def _match_suspicious_patterns(content):
+        """Return the names of the suspicious patterns found in a bytes-like object, in declaration order"""
+        # One Aho-Corasick pass over the bytes, window by window; bytes.lower()
+        # folds ASCII only, matching re.IGNORECASE on bytes patterns
+        matched = set()
+        candidates = set()
+        for start in range(0, len(content), _SCAN_CHUNK):
+            window = content[start:start + _SCAN_CHUNK + _ANCHOR_OVERLAP].lower().decode('latin1')
+            for _, hits in _ANCHOR_AUTOMATON.iter(window):
+                for name, exact in hits:
+                    if exact:
+                        matched.add(name)
+                    else:
+                        candidates.add(name)
+            if len(matched) == len(_COMPILED_PATTERNS):
+                break
+
+        # Only inexact anchors need the regex to confirm a match
+        for name in candidates - matched:
+            if _COMPILED_PATTERNS[name].search(content):
+                matched.add(name)
+
+        return [name for name in _COMPILED_PATTERNS if name in matched]
@@ -0,0 +1,38 @@
+import json
+
+# orjson is an optional speedup; fall back to the stdlib encoder without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj, indent=False):
+    """Serialize obj to a JSON string
+
+    Args:
+        obj: JSON-serializable object
+        indent (bool): Pretty-print with a two-space indent
+
+    Returns:
+        str: Encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+def dump_to_file(obj, path):
+    """Write obj as compact JSON to path
+
+    Args:
+        obj: JSON-serializable object
+        path (str): Destination file
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f)
@@ -1,83 +1,225 @@
 # saferun/utils/logger.py
 import os
+import queue
+import atexit
+import threading
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 
 from saferun.config import settings
 
+# Bytes a text-mode file adds per \n beyond the one it replaces (1 on Windows)
+_NEWLINE_EXTRA = len(os.linesep) - 1
+
+# Set by init_worker_logging() in worker processes: records go to the parent
+_forward_queue = None
+
+def init_worker_logging(log_queue):
+    """ProcessPoolExecutor initializer that sends this worker's log records to
+    a queue made by forward_worker_logs() in the parent.
+    
+    The worker then opens no log files, so only the parent writes and rotates
+    them. Must run before the worker first uses LogManager.
+    """
+    global _forward_queue
+    _forward_queue = log_queue
+
+class _RelayHandler(logging.Handler):
+    """Hands records from worker processes to this process's own loggers"""
+    
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+def forward_worker_logs(mp_context):
+    """Create the queue to pass to init_worker_logging() and relay whatever
+    arrives on it through this process's logging
+    
+    Args:
+        mp_context: multiprocessing context the workers are started with
+    
+    Returns:
+        Queue: Pass as initargs=(queue,) alongside initializer=init_worker_logging
+    """
+    LogManager()
+    log_queue = mp_context.Queue()
+    listener = QueueListener(log_queue, _RelayHandler())
+    listener.start()
+    # Registered after LogManager's listener, so it stops (and flushes) first
+    atexit.register(listener.stop)
+    return log_queue
+
+class SizeTrackingRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that keeps the file size in memory.
+
+    The stock handler seeks (and on newer Pythons stats) the log file on every
+    record to decide whether to roll over. This one reads the size once when
+    the file is opened and adds each record's encoded length after writing it.
+    The count is only right while this process is the file's sole writer;
+    worker processes forward their records instead (see init_worker_logging).
+
+    Every record is flushed to the OS as it is written (as StreamHandler
+    does); CRITICAL records are additionally fsync'ed so they reach the disk
+    even if the process or machine goes down right after.
+    """
+    
+    def _open(self):
+        stream = super()._open()
+        self._written = os.fstat(stream.fileno()).st_size
+        return stream
+    
+    def emit(self, record):
+        try:
+            # Format once: the same text is measured for rollover and then written
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            size = len(msg.encode(self.stream.encoding, self.stream.errors))
+            if _NEWLINE_EXTRA:
+                # Text mode writes os.linesep for each \n
+                size += msg.count('\n') * _NEWLINE_EXTRA
+            if self.maxBytes > 0 and self._written and self._written + size >= self.maxBytes:
+                # doRollover() reopens the file, which resets _written to its size
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self.stream.flush()
+            self._written += size
+            if record.levelno >= logging.CRITICAL:
+                try:
+                    os.fsync(self.stream.fileno())
+                except OSError:
+                    pass
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class SecondCachedFormatter(logging.Formatter):
+    """Formatter that renders each second's timestamp only once.
+    
+    LogManager's date format has one-second resolution, so every record in
+    the same second gets the same asctime; localtime() + strftime() run once
+    per second instead of once per record.
+    """
+    
+    _cache = (None, None, None)
+    
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, cached_datefmt, text = self._cache
+        if second != cached_second or datefmt != cached_datefmt:
+            text = super().formatTime(record, datefmt)
+            self._cache = (second, datefmt, text)
+        return text
+
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Shared by every handler that uses them; component handlers share one
+# formatter so its cached timestamp serves all component log files
+_MAIN_FORMATTER = SecondCachedFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', _DATE_FORMAT)
+_COMPONENT_FORMATTER = SecondCachedFormatter('%(asctime)s - %(levelname)s - %(message)s', _DATE_FORMAT)
+
 class LogManager:
     _instance = None
+    _instance_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(LogManager, cls).__new__(cls)
-            cls._instance._initialize_logging()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    # Publish only once fully initialized
+                    instance = super(LogManager, cls).__new__(cls)
+                    instance._initialize_logging()
+                    cls._instance = instance
         return cls._instance
     
     def _initialize_logging(self):
         """Initialize logging configuration"""
-        # Ensure log directory exists
+        # Ensure log directory exists (once: this runs only for the singleton)
         os.makedirs(settings.LOG_DIR, exist_ok=True)
+        # Log file paths are built by concatenation onto this prefix
+        self._log_dir_prefix = str(settings.LOG_DIR) + os.sep
         
-        # Set up logging format
-        log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        date_format = '%Y-%m-%d %H:%M:%S'
-        formatter = logging.Formatter(log_format, date_format)
+        self.loggers = {}
+        # Loggers that also write to their own <name>.log
+        self._dedicated_files = set()
+        self._lock = threading.Lock()
         
-        # Set up root logger
+        # Set up root logger. Its only handler queues records; a background
+        # listener thread does the console and file writes so callers never
+        # block on disk I/O or rotation.
         self.root_logger = logging.getLogger('saferun')
         self.root_logger.setLevel(logging.DEBUG)
+        if _forward_queue is not None:
+            # Worker process: the parent's listener does all the writing
+            self.root_logger.addHandler(QueueHandler(_forward_queue))
+            self._listener = None
+            return
+        log_queue = queue.SimpleQueue()
+        self.root_logger.addHandler(QueueHandler(log_queue))
         
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        self.root_logger.addHandler(console_handler)
+        console_handler.setFormatter(_MAIN_FORMATTER)
         
         # File handler
-        main_log_file = os.path.join(settings.LOG_DIR, 'saferun.log')
-        file_handler = RotatingFileHandler(
+        main_log_file = self._log_dir_prefix + 'saferun.log'
+        file_handler = SizeTrackingRotatingFileHandler(
             main_log_file, 
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5
         )
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        self.root_logger.addHandler(file_handler)
+        file_handler.setFormatter(_MAIN_FORMATTER)
         
-        self.loggers = {}
+        self._listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        self._listener.start()
+        # Flush whatever is still queued on shutdown
+        atexit.register(self._listener.stop)
     
-    def get_logger(self, name):
+    def get_logger(self, name, dedicated_file=False):
         """Get a named logger
         
+        Records from every component go to saferun.log, tagged with the
+        logger name. Components that need a separate file (e.g. high-volume
+        ones) can ask for one as well.
+        
         Args:
             name (str): Logger name
+            dedicated_file (bool): Also write this logger's records to <name>.log
             
         Returns:
             logging.Logger: Configured logger
         """
         logger_name = f'saferun.{name}'
         
-        if logger_name in self.loggers:
-            return self.loggers[logger_name]
-        
-        # Create a new logger
-        logger = logging.getLogger(logger_name)
-        
-        # Create a specific log file for this component
-        component_log_file = os.path.join(settings.LOG_DIR, f'{name}.log')
-        component_handler = RotatingFileHandler(
-            component_log_file, 
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=3
-        )
-        component_handler.setLevel(logging.DEBUG)
-        component_handler.setFormatter(logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s', 
-            '%Y-%m-%d %H:%M:%S'
-        ))
-        logger.addHandler(component_handler)
+        logger = self.loggers.get(logger_name)
+        if logger is not None and (not dedicated_file or logger_name in self._dedicated_files):
+            return logger
         
-        self.loggers[logger_name] = logger
-        return logger
\ No newline at end of file
+        # Re-check under the lock so concurrent callers attach only one file handler
+        with self._lock:
+            logger = logging.getLogger(logger_name)
+            self.loggers[logger_name] = logger
+            # Workers write no files; their records still reach saferun.log via the parent
+            if not dedicated_file or logger_name in self._dedicated_files or self._listener is None:
+                return logger
+            
+            # Create a specific log file for this component
+            component_log_file = f'{self._log_dir_prefix}{name}.log'
+            component_handler = SizeTrackingRotatingFileHandler(
+                component_log_file, 
+                maxBytes=5*1024*1024,  # 5MB
+                backupCount=3
+            )
+            component_handler.setLevel(logging.DEBUG)
+            component_handler.setFormatter(_COMPONENT_FORMATTER)
+            # Records reach the listener through the root logger's queue, so the
+            # component file only takes records from this logger and its children
+            component_handler.addFilter(logging.Filter(logger_name))
+            self._listener.handlers += (component_handler,)
+            self._dedicated_files.add(logger_name)
+            
+            return logger
\ No newline at end of file
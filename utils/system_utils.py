@@ -1,28 +1,62 @@
 import os
+import functools
 import platform
 import psutil
 import shutil
+import signal
 import subprocess
 import logging
+import socket
+import threading
+import time
 from pathlib import Path
 import tempfile
-import uuid
+
+from saferun.config import settings
+
+# shell32!IsUserAnAdmin, bound once so is_admin() skips ctypes' attribute lookups
+if platform.system() == "Windows":
+    import ctypes
+    _IsUserAnAdmin = ctypes.WinDLL("shell32").IsUserAnAdmin
+    _IsUserAnAdmin.restype = ctypes.c_int
+else:
+    _IsUserAnAdmin = None
+
+# Effective identity used to read access rights off st_mode (POSIX only)
+if os.name == "posix":
+    _EUID = os.geteuid()
+    _GROUPS = frozenset(os.getgroups()) | {os.getegid()}
+else:
+    _EUID = None
+    _GROUPS = frozenset()
 
 logger = logging.getLogger(__name__)
 
-def get_system_info():
-    """Get basic system information."""
+# Where the Docker daemon usually listens (Linux, then Docker Desktop for Mac)
+DOCKER_SOCKET_PATHS = ("/var/run/docker.sock", os.path.expanduser("~/.docker/run/docker.sock"))
+
+@functools.lru_cache(maxsize=1)
+def _static_system_info():
+    """System facts that cannot change while the process runs, gathered on first use."""
     return {
         "os": platform.system(),
         "os_version": platform.version(),
         "architecture": platform.machine(),
         "processor": platform.processor(),
         "python_version": platform.python_version(),
-        "hostname": platform.node(),
-        "ram_total": psutil.virtual_memory().total,
-        "ram_available": psutil.virtual_memory().available
+        "hostname": platform.node()
     }
 
+def get_system_info():
+    """Get basic system information."""
+    memory = psutil.virtual_memory()
+    return {
+        **_static_system_info(),
+        "ram_total": memory.total,
+        "ram_available": memory.available
+    }
+
+@functools.lru_cache(maxsize=None)
 def check_platform_support():
     """Check if current platform is supported."""
     system = platform.system().lower()
@@ -30,9 +64,7 @@ def check_platform_support():
 
 def create_temp_directory():
     """Create a temporary directory for safe execution."""
-    temp_dir = Path(tempfile.gettempdir()) / f"saferun_{uuid.uuid4().hex}"
-    os.makedirs(temp_dir, exist_ok=True)
-    return temp_dir
+    return Path(tempfile.mkdtemp(prefix="saferun_"))
 
 def clean_temp_directory(directory):
     """Safely remove a temporary directory."""
@@ -45,44 +77,131 @@ def clean_temp_directory(directory):
         return False
     return False
 
+@functools.lru_cache(maxsize=None)
+def _check_admin():
+    # Raises on failure, so lru_cache only keeps real answers
+    if _IsUserAnAdmin is not None:
+        return _IsUserAnAdmin() != 0
+    return os.geteuid() == 0
+
 def is_admin():
-    """Check if the current process has administrator/root privileges."""
+    """Check if the current process has administrator/root privileges.
+
+    A successful check is computed once per process; a failed one reports
+    False and is retried on the next call.
+    """
     try:
-        if platform.system() == "Windows":
-            import ctypes
-            return ctypes.windll.shell32.IsUserAnAdmin() != 0
-        else:
-            return os.geteuid() == 0
+        return _check_admin()
     except Exception:
         return False
 
-def get_process_info(pid):
-    """Get detailed information about a running process."""
+# psutil.Process objects by PID, reused across calls so cpu_percent() has a
+# previous sample to measure against and the PID lookup is not repeated
+_PROCESS_CACHE = {}
+_PROCESS_CACHE_SIZE = 256
+_process_cache_lock = threading.Lock()
+
+def _get_process(pid):
+    """Return a psutil.Process for pid, reusing the cached one while it is
+    still the same process (is_running() compares create times, so a
+    recycled PID gets a fresh object)."""
+    with _process_cache_lock:
+        process = _PROCESS_CACHE.get(pid)
+    if process is not None:
+        if process.is_running():
+            return process
+        _forget_process(pid)
+    process = psutil.Process(pid)
+    with _process_cache_lock:
+        if pid not in _PROCESS_CACHE and len(_PROCESS_CACHE) >= _PROCESS_CACHE_SIZE:
+            _PROCESS_CACHE.pop(next(iter(_PROCESS_CACHE)))
+        _PROCESS_CACHE[pid] = process
+    return process
+
+def _forget_process(pid):
+    with _process_cache_lock:
+        _PROCESS_CACHE.pop(pid, None)
+
+def get_process_info(pid, detail=False):
+    """Get detailed information about a running process.
+    
+    Open files and connections are only listed when detail is True, since
+    walking the process's file descriptors costs far more than the rest.
+    """
     try:
-        process = psutil.Process(pid)
-        return {
-            "pid": pid,
-            "name": process.name(),
-            "status": process.status(),
-            "created_time": process.create_time(),
-            "cpu_percent": process.cpu_percent(),
-            "memory_percent": process.memory_percent(),
-            "executable": process.exe(),
-            "command_line": process.cmdline(),
-            "open_files": [f.path for f in process.open_files()],
-            "connections": [c._asdict() for c in process.connections()],
-            "threads": process.num_threads()
-        }
+        process = _get_process(pid)
+        # oneshot() lets the getters below share one read of the process's stat data
+        with process.oneshot():
+            info = {
+                "pid": pid,
+                "name": process.name(),
+                "status": process.status(),
+                "created_time": process.create_time(),
+                "cpu_percent": process.cpu_percent(),
+                "memory_percent": process.memory_percent(),
+                "executable": process.exe(),
+                "command_line": process.cmdline(),
+                "threads": process.num_threads()
+            }
+            if detail:
+                info["open_files"] = [f.path for f in process.open_files()]
+                info["connections"] = [c._asdict() for c in process.connections()]
+            return info
     except psutil.NoSuchProcess:
+        _forget_process(pid)
         return {"error": f"Process with PID {pid} not found"}
     except Exception as e:
         return {"error": str(e)}
 
-def kill_process(pid):
-    """Kill a process by its PID."""
+# Per-process fields cheap enough to collect for every process in one pass
+_BATCH_PROCESS_ATTRS = ['pid', 'name', 'status', 'create_time', 'cpu_percent',
+                        'memory_percent', 'exe', 'cmdline', 'num_threads']
+
+def get_processes_info(pids=None):
+    """Get information about many processes in a single process_iter() pass.
+    
+    Returns the same fields as get_process_info() without detail.
+    
+    Args:
+        pids (iterable, optional): PIDs to include; all processes if None
+    
+    Returns:
+        list: One dict per matching process that is still running
+    """
+    wanted = set(pids) if pids is not None else None
+    processes = []
+    for process in psutil.process_iter(attrs=_BATCH_PROCESS_ATTRS, ad_value=None):
+        info = process.info
+        if wanted is not None and info['pid'] not in wanted:
+            continue
+        processes.append({
+            "pid": info['pid'],
+            "name": info['name'],
+            "status": info['status'],
+            "created_time": info['create_time'],
+            "cpu_percent": info['cpu_percent'],
+            "memory_percent": info['memory_percent'],
+            "executable": info['exe'],
+            "command_line": info['cmdline'],
+            "threads": info['num_threads']
+        })
+    return processes
+
+def kill_process(pid, grace=0.5):
+    """Kill a process by its PID.
+    
+    The process is asked to terminate first and only killed if it is still
+    running after grace seconds.
+    """
     try:
-        process = psutil.Process(pid)
-        process.kill()
+        process = _get_process(pid)
+        process.terminate()
+        try:
+            process.wait(timeout=grace)
+        except psutil.TimeoutExpired:
+            process.kill()
+            process.wait(timeout=1.0)
+        _forget_process(pid)
         return True
     except Exception as e:
         logger.error(f"Failed to kill process {pid}: {e}")
@@ -91,13 +210,7 @@ def kill_process(pid):
 def execute_command(command, timeout=60, shell=False):
     """Execute a system command safely."""
     try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            shell=shell
-        )
+        result = run_capped(command, timeout=timeout, shell=shell)
         return {
             "returncode": result.returncode,
             "stdout": result.stdout,
@@ -109,45 +222,203 @@ def execute_command(command, timeout=60, shell=False):
     except Exception as e:
         return {"error": str(e), "success": False}
 
+def _drain_capped(stream, out, limit):
+    """Read stream to EOF, keeping at most limit bytes in out"""
+    try:
+        while True:
+            block = stream.read1(65536)
+            if not block:
+                break
+            if len(out) < limit:
+                out += block[:limit - len(out)]
+    finally:
+        stream.close()
+
+# How long to keep reading after a timed-out process is killed, in seconds
+_KILL_DRAIN_GRACE = 1.0
+
+def _owns_process_group(process):
+    """True if process leads its own process group (started with start_new_session)"""
+    if os.name != "posix":
+        return False
+    try:
+        return os.getpgid(process.pid) == process.pid
+    except OSError:
+        return False
+
+def _kill_process_group(process, own_group):
+    """Kill process and, when it leads its own group, everything it spawned"""
+    if own_group:
+        try:
+            # The group outlives its leader while any member is alive
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    process.kill()
+
+def communicate_capped(process, timeout=None, limit=None):
+    """Like Popen.communicate() for a process started with stdout/stderr=PIPE
+    in binary mode, but keep at most limit bytes (default
+    settings.MAX_OUTPUT_BYTES) of each stream.
+
+    Output past the limit is read and discarded so the child never blocks on
+    a full pipe. The timeout covers reading the output too: if the process
+    (or anything it spawned that still holds the pipes) outlives it, the
+    process is killed, together with its process group if it leads one, and
+    TimeoutExpired is raised with the decoded output collected so far.
+
+    Returns:
+        tuple: (stdout, stderr) decoded as UTF-8 with replacement
+    """
+    limit = settings.MAX_OUTPUT_BYTES if limit is None else limit
+    own_group = _owns_process_group(process)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    buffers = []
+    readers = []
+    for stream in (process.stdout, process.stderr):
+        out = bytearray()
+        buffers.append(out)
+        if stream is not None:
+            reader = threading.Thread(target=_drain_capped, args=(stream, out, limit), daemon=True)
+            reader.start()
+            readers.append(reader)
+
+    try:
+        process.wait(timeout=timeout)
+        for reader in readers:
+            reader.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        timed_out = any(reader.is_alive() for reader in readers)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+    if timed_out:
+        _kill_process_group(process, own_group)
+        process.wait()
+        # Something outside the group may still hold the pipes open; the
+        # daemon readers are left to finish on their own rather than waited on
+        grace_deadline = time.monotonic() + _KILL_DRAIN_GRACE
+        for reader in readers:
+            reader.join(max(grace_deadline - time.monotonic(), 0))
+
+    stdout, stderr = (bytes(out).decode("utf-8", errors="replace") for out in buffers)
+    if timed_out:
+        raise subprocess.TimeoutExpired(process.args, timeout, output=stdout, stderr=stderr)
+    return stdout, stderr
+
+def run_capped(command, timeout=None, limit=None, **kwargs):
+    """subprocess.run(command, capture_output=True, text=True) with output
+    capped per stream as in communicate_capped()"""
+    if os.name == "posix":
+        # Own process group, so a timeout also kills whatever the command spawned
+        kwargs.setdefault("start_new_session", True)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    stdout, stderr = communicate_capped(process, timeout=timeout, limit=limit)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+def docker_ping(socket_paths=DOCKER_SOCKET_PATHS, timeout=0.5):
+    """Check whether a Docker daemon answers /_ping on a local Unix socket.
+
+    Returns:
+        bool or None: True if any existing socket answers, False if sockets
+        exist but none answers, or None when none of them exist (the caller
+        should fall back to the CLI)
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    found = False
+    for path in socket_paths:
+        if not os.path.exists(path):
+            continue
+        found = True
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(path)
+                sock.sendall(b"GET /_ping HTTP/1.0\r\nHost: docker\r\n\r\n")
+                response = sock.recv(256)
+        except OSError:
+            # e.g. a stale socket left by a stopped daemon; try the next one
+            continue
+        status_line = response.split(b"\r\n", 1)[0]
+        if status_line.startswith(b"HTTP/1.") and b" 200 " in status_line + b" ":
+            return True
+    return False if found else None
+
 def get_open_ports():
     """Get a list of open network ports on the system."""
-    connections = psutil.net_connections()
-    open_ports = []
-    
-    for conn in connections:
-        if conn.status == 'LISTEN':
-            open_ports.append({
-                "port": conn.laddr.port,
-                "address": conn.laddr.ip,
-                "pid": conn.pid,
-                "protocol": "TCP"  # psutil typically reports TCP
-            })
-    
-    return open_ports
+    # Only TCP sockets have a LISTEN state; let psutil drop UDP up front
+    connections = psutil.net_connections(kind='tcp')
+    listen = psutil.CONN_LISTEN
+    return [
+        {
+            "port": conn.laddr.port,
+            "address": conn.laddr.ip,
+            "pid": conn.pid,
+            "protocol": "TCP"
+        }
+        for conn in connections
+        if conn.status == listen
+    ]
+
+# How long a get_disk_usage() result is reused for the same device, in seconds
+DISK_USAGE_CACHE_TTL = 1.0
+# st_dev -> (monotonic time checked, usage dict)
+_disk_usage_cache = {}
 
 def get_disk_usage(path=None):
-    """Get disk usage information."""
+    """Get disk usage information.
+    
+    Results are cached per filesystem (st_dev) for DISK_USAGE_CACHE_TTL seconds.
+    """
     if path is None:
         path = os.getcwd()
     
-    return shutil.disk_usage(path)._asdict()
+    device = os.stat(path).st_dev
+    now = time.monotonic()
+    cached = _disk_usage_cache.get(device)
+    if cached is not None and now - cached[0] < DISK_USAGE_CACHE_TTL:
+        return dict(cached[1])
+    
+    usage = shutil.disk_usage(path)._asdict()
+    _disk_usage_cache[device] = (now, usage)
+    return dict(usage)
+
+def _mode_access(stats):
+    """Return (readable, writable, executable) for this process from a stat result."""
+    mode = stats.st_mode
+    if _EUID == 0:
+        # root bypasses read/write bits but still needs some execute bit
+        return True, True, bool(mode & 0o111)
+    if stats.st_uid == _EUID:
+        bits = mode >> 6
+    elif stats.st_gid in _GROUPS:
+        bits = mode >> 3
+    else:
+        bits = mode
+    return bool(bits & 4), bool(bits & 2), bool(bits & 1)
 
 def check_file_permissions(filepath):
     """Check file permissions."""
-    if not os.path.exists(filepath):
-        return {"error": "File does not exist"}
-    
     try:
         stats = os.stat(filepath)
-        return {
-            "exists": True,
-            "permissions": oct(stats.st_mode)[-3:],
-            "owner": stats.st_uid,
-            "group": stats.st_gid,
-            "size": stats.st_size,
-            "is_readable": os.access(filepath, os.R_OK),
-            "is_writable": os.access(filepath, os.W_OK),
-            "is_executable": os.access(filepath, os.X_OK)
-        }
+    except FileNotFoundError:
+        return {"error": "File does not exist"}
     except Exception as e:
         return {"error": str(e)}
+    
+    if _EUID is not None:
+        is_readable, is_writable, is_executable = _mode_access(stats)
+    else:
+        is_readable = os.access(filepath, os.R_OK)
+        is_writable = os.access(filepath, os.W_OK)
+        is_executable = os.access(filepath, os.X_OK)
+    
+    return {
+        "exists": True,
+        "permissions": oct(stats.st_mode)[-3:],
+        "owner": stats.st_uid,
+        "group": stats.st_gid,
+        "size": stats.st_size,
+        "is_readable": is_readable,
+        "is_writable": is_writable,
+        "is_executable": is_executable
+    }